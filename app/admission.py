@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from collections import deque
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, status=503, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class AdmissionTicket:
+    def __init__(self, kind, memory, threads):
+        self.kind = kind
+        self.memory = memory
+        self.threads = threads
+
+class AdmissionController:
+    # Admits heavy requests against global memory and core budgets. Waiting
+    # requests are served first-come first-served so large jobs are not
+    # starved by a stream of small ones.
+    def __init__(self, memory_budget_bytes, cpu_budget=None, max_threads_per_job=None,
+                 queue_timeout=30, max_queue=16, retry_after=10, bytes_per_cell=48,
+                 file_overhead=2.0, weights=None):
+        self.memory_budget = memory_budget_bytes
+        self.cpu_budget = cpu_budget or os.cpu_count() or 1
+        # By default a training job may take half the cores, so one other
+        # job can always run alongside it
+        self.max_threads_per_job = max_threads_per_job or max(1, self.cpu_budget // 2)
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.bytes_per_cell = bytes_per_cell
+        self.file_overhead = file_overhead
+        self.weights = weights or {'process': 1.0, 'delta': 0.5, 'eda': 0.5, 'analyze': 0.5, 'importance': 2.0}
+
+        self.memory_in_use = 0
+        self.cpu_in_use = 0
+        self._waiting = deque()
+        self._condition = threading.Condition()
+
+    def estimate(self, kind, file_bytes, rows, cols, rows_used=None):
+        rows_used = rows if rows_used is None else min(rows_used, rows)
+        fraction = rows_used / rows if rows else 1.0
+
+        # Parsed frame plus the preprocessing copies, and the text buffers
+        # pandas holds while parsing the part of the file that is read
+        frame_bytes = rows_used * cols * self.bytes_per_cell * self.weights.get(kind, 1.0)
+        parse_bytes = file_bytes * fraction * self.file_overhead
+
+        return int(frame_bytes + parse_bytes)
+
+    def _fits(self, memory):
+        return self.memory_in_use + memory <= self.memory_budget and self.cpu_in_use < self.cpu_budget
+
+    def acquire(self, kind, memory, threads=None):
+        threads = threads or self.max_threads_per_job
+
+        if memory > self.memory_budget:
+            raise AdmissionRejected(
+                f"Estimated memory {memory / 1e6:.0f}MB exceeds the {self.memory_budget / 1e6:.0f}MB budget; "
+                "try mode=quick or a smaller sample_size",
+                status=413
+            )
+
+        marker = object()
+        with self._condition:
+            if len(self._waiting) >= self.max_queue:
+                raise AdmissionRejected("Server is busy; admission queue is full", retry_after=self.retry_after)
+
+            self._waiting.append(marker)
+            deadline = time.time() + self.queue_timeout
+            try:
+                while not (self._waiting[0] is marker and self._fits(memory)):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise AdmissionRejected(
+                            f"Server is busy; {kind} request waited {self.queue_timeout}s for resources",
+                            retry_after=self.retry_after
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting.remove(marker)
+                self._condition.notify_all()
+
+            # Concurrent jobs split the free cores instead of each using all of them
+            granted = max(1, min(threads, self.cpu_budget - self.cpu_in_use))
+            self.memory_in_use += memory
+            self.cpu_in_use += granted
+
+        return AdmissionTicket(kind, memory, granted)
+
+    def release(self, ticket):
+        if ticket is None:
+            return
+
+        with self._condition:
+            self.memory_in_use -= ticket.memory
+            self.cpu_in_use -= ticket.threads
+            self._condition.notify_all()
+
+    def status(self):
+        with self._condition:
+            return {
+                'memory_in_use': self.memory_in_use,
+                'memory_budget': self.memory_budget,
+                'cpu_in_use': self.cpu_in_use,
+                'cpu_budget': self.cpu_budget,
+                'queued': len(self._waiting)
+            }
@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import json
+from pathlib import Path
+import numpy as np
+from flask import request, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, Path):
+        return str(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(
+            payload,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+def _flatten(record, prefix=''):
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+def to_columnar(records):
+    flat = [_flatten(record) for record in records]
+    columns = list(dict.fromkeys(key for record in flat for key in record))
+
+    return {
+        'format': 'columnar',
+        'length': len(flat),
+        'columns': columns,
+        'data': {column: [record.get(column) for record in flat] for column in columns}
+    }
+
+def wants_columnar(data=None):
+    fmt = request.args.get('format') or (data or {}).get('format')
+    return fmt == 'columnar'
+
+def make_etag(*parts):
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+def is_not_modified(etag):
+    return etag is not None and request.if_none_match.contains_weak(etag)
+
+def not_modified_response(etag):
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+def _negotiate_encoding():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def json_response(payload, status=200, etag=None):
+    if status == 200 and is_not_modified(etag):
+        return not_modified_response(etag)
+
+    body = dumps(payload)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = _negotiate_encoding()
+        if encoding == 'br':
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers['Content-Encoding'] = 'br'
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+
+    response = Response(body, status=status, mimetype='application/json', headers=headers)
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
@@ -4,14 +4,23 @@ from werkzeug.utils import secure_filename
 import os
 import sys
 from pathlib import Path
+import time
 import pandas as pd
+import yaml
 
 sys.path.append(str(Path(__file__).parent.parent))
 
+from app.admission import AdmissionController, AdmissionRejected
+from app.responses import json_response, make_etag, is_not_modified, not_modified_response, to_columnar, wants_columnar
 from src.data.upload_handler import UploadHandler
+from src.data.chunked_upload import ChunkedUploadManager, ChunkedUploadError
+from src.data.sampling import StratifiedReservoirSampler
+from src.data.delta import CatalogDeltaTracker
 from src.data.preprocess import ExoplanetPreprocessor
 from src.models.train import ExoplanetClassifier
-from src.models.predict import ExoplanetPredictor
+from src.models.registry import ModelRegistry, InferenceSnapshot
+from src.models.similarity import SimilarityIndex
+from src.evaluation.importance import FeatureImportanceService
 from src.utils.eda_utils import EDAUtils
 from src.utils.three_d_utils import Galaxy3DGenerator
 
@@ -21,17 +30,77 @@ CORS(app)
 app.config['UPLOAD_FOLDER'] = 'data/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024
 
+with open('config/config.yaml', 'r') as f:
+    config = yaml.safe_load(f)
+
 upload_handler = UploadHandler()
-preprocessor = ExoplanetPreprocessor()
-classifier = ExoplanetClassifier()
+chunked_uploads = ChunkedUploadManager(
+    upload_folder=app.config['UPLOAD_FOLDER'],
+    chunk_size=config['upload']['chunk_size'],
+    max_file_size=config['upload']['max_chunked_file_size'],
+    max_chunk_size=app.config['MAX_CONTENT_LENGTH'],
+    session_ttl=config['upload'].get('chunked_session_ttl', 24 * 3600)
+)
 galaxy_generator = Galaxy3DGenerator()
+registry = ModelRegistry('models/inference_bundle.pkl')
+delta_tracker = CatalogDeltaTracker('data/processed/delta')
+importance_service = FeatureImportanceService(**config['importance'])
+admission = AdmissionController(**config['admission'])
 
 try:
-    classifier.load_model('models/trained_model.pkl')
+    registry.load()
     print("Pre-trained model loaded successfully")
 except:
     print("No pre-trained model found. Will train on first upload.")
 
+def make_sampler(sample_size=None):
+    if sample_size is None:
+        sample_size = config['sampling']['sample_size']
+    if isinstance(sample_size, bool) or not str(sample_size).strip().isdigit() or int(sample_size) <= 0:
+        raise ValueError(f"sample_size must be a positive integer, got {sample_size!r}")
+
+    return StratifiedReservoirSampler(
+        sample_size=int(sample_size),
+        strata_column=config['sampling']['strata_column'],
+        chunksize=config['sampling']['chunksize']
+    )
+
+def auto_sampler(filepath, data=None):
+    data = data or {}
+    if data.get('sample') or data.get('sample_size') is not None:
+        return make_sampler(data.get('sample_size'))
+    if data.get('sample') is None and Path(filepath).stat().st_size > config['sampling']['auto_threshold_bytes']:
+        return make_sampler()
+    return None
+
+MULTI_CORE_JOBS = ('process', 'importance')
+
+def admit(kind, filepath, sampler=None):
+    # Only training and permutation importance use more than one core;
+    # everything else is granted one
+    rows, cols = upload_handler.shape(filepath)
+    memory = admission.estimate(
+        kind, Path(filepath).stat().st_size, rows, cols,
+        rows_used=sampler.sample_size if sampler is not None else None
+    )
+    return admission.acquire(kind, memory, threads=None if kind in MULTI_CORE_JOBS else 1)
+
+def admit_or_error(kind, filepath, sampler=None):
+    # Returns (ticket, None) or (None, error response)
+    try:
+        return admit(kind, filepath, sampler), None
+    except AdmissionRejected as e:
+        return None, rejected_response(e)
+    except Exception as e:
+        return None, (jsonify({'error': f'Could not read {Path(filepath).name}: {e}'}), 400)
+
+def rejected_response(error):
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
 @app.route('/')
 def index():
     return send_from_directory(app.static_folder, 'index.html')
@@ -49,6 +118,7 @@ def upload_file():
     if not file.filename.endswith('.csv'):
         return jsonify({'error': 'Only CSV files are allowed'}), 400
 
+    ticket = None
     try:
         filepath = upload_handler.save_upload(file)
 
@@ -56,9 +126,19 @@ def upload_file():
         if not is_valid:
             return jsonify({'error': f'Invalid CSV: {message}'}), 400
 
-        analysis = upload_handler.analyze_upload(filepath)
+        # Hashing and analysing read the whole file, so they wait for the
+        # same budget as a chunked finalize. A rejected upload is discarded
+        # and must be sent again.
+        sampler = auto_sampler(filepath)
+        ticket, error = admit_or_error('analyze', filepath, sampler)
+        if error is not None:
+            filepath.unlink(missing_ok=True)
+            return error
 
-        return jsonify({
+        upload_handler.fingerprint(filepath)
+        analysis = upload_handler.analyze_upload(filepath, sampler=sampler)
+
+        return json_response({
             'success': True,
             'filepath': str(filepath),
             'analysis': analysis,
@@ -68,6 +148,102 @@ def upload_file():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    finally:
+        admission.release(ticket)
+
+@app.route('/api/upload/chunked', methods=['POST'])
+def initiate_chunked_upload():
+    data = request.json or {}
+    filename = secure_filename(data.get('filename', ''))
+
+    if not filename:
+        return jsonify({'error': 'No filename provided'}), 400
+
+    if not filename.endswith('.csv'):
+        return jsonify({'error': 'Only CSV files are allowed'}), 400
+
+    if not data.get('total_size') or not data.get('checksum'):
+        return jsonify({'error': 'total_size and checksum are required'}), 400
+
+    try:
+        manifest = chunked_uploads.initiate(
+            filename,
+            data['total_size'],
+            data['checksum'],
+            chunk_size=data.get('chunk_size')
+        )
+        return jsonify({'success': True, **manifest})
+
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/upload/chunked/<upload_id>/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    try:
+        chunk = chunked_uploads.write_chunk(upload_id, index, request.stream)
+        return jsonify({'success': True, **chunk})
+
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def chunked_upload_status(upload_id):
+    try:
+        return jsonify(chunked_uploads.status(upload_id))
+
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['DELETE'])
+def abort_chunked_upload(upload_id):
+    try:
+        chunked_uploads.abort(upload_id)
+        return jsonify({'success': True})
+
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/upload/chunked/<upload_id>/finalize', methods=['POST'])
+def finalize_chunked_upload(upload_id):
+    # Admission is checked on the staged file before finalizing, so a
+    # rejected request leaves the upload in place for the client to retry
+    try:
+        staged_path = chunked_uploads.staged_path(upload_id)
+    except ChunkedUploadError as e:
+        return jsonify({'error': str(e)}), 404
+
+    ticket, error = admit_or_error('analyze', staged_path, auto_sampler(staged_path))
+    if error is not None:
+        return error
+
+    try:
+        try:
+            filepath, digest = chunked_uploads.finalize(upload_id)
+        except ChunkedUploadError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # The checksum was just verified, so later ETag checks need not rehash
+        upload_handler.remember_fingerprint(filepath, digest)
+
+        is_valid, message = upload_handler.validate_csv(filepath)
+        if not is_valid:
+            return jsonify({'error': f'Invalid CSV: {message}'}), 400
+
+        analysis = upload_handler.analyze_upload(filepath, sampler=auto_sampler(filepath))
+
+        return json_response({
+            'success': True,
+            'filepath': str(filepath),
+            'analysis': analysis,
+            'message': 'File uploaded successfully'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    finally:
+        admission.release(ticket)
+
 @app.route('/api/process', methods=['POST'])
 def process_data():
     data = request.json
@@ -76,47 +252,138 @@ def process_data():
     if not filepath or not Path(filepath).exists():
         return jsonify({'error': 'Invalid file path'}), 400
 
-    try:
-        df = pd.read_csv(filepath)
+    columnar = wants_columnar(data)
+    explain = bool(data.get('explain'))
+    fingerprint = upload_handler.fingerprint(filepath)
+    snapshot = registry.current()
 
-        X, y = preprocessor.preprocess(df, fit=True)
-
-        if y is not None and len(y.dropna()) > 10:
-            y_clean = y.dropna()
-            X_clean = X.loc[y_clean.index]
+    # Quick mode trains and predicts on a bounded stratified sample; the
+    # sample is deterministic, so it is identified by its size. A model
+    # trained on a sample replaces the served one only with publish: true.
+    try:
+        sampler = make_sampler(data.get('sample_size')) if data.get('mode') == 'quick' else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if sampler is not None:
+        fingerprint = f"{fingerprint}:sample-{sampler.sample_size}"
+    publish = sampler is None or bool(data.get('publish'))
+
+    # Delta mode never retrains: it rescores only rows whose content changed
+    # since the last upload of the same catalog.
+    delta = data.get('mode') == 'delta'
+    response_variant = (columnar, explain, delta)
+
+    # A changes-only response depends on the previous upload, not just this one
+    cacheable = not (delta and data.get('changes_only'))
+
+    # A response produced by the current snapshot for this dataset can only
+    # change after a retrain, which always publishes a new model version.
+    if snapshot is not None and cacheable and not data.get('retrain'):
+        etag = make_etag('process', fingerprint, snapshot.version, *response_variant)
+        if is_not_modified(etag):
+            return not_modified_response(etag)
+
+    ticket, error = admit_or_error('delta' if delta else 'process', filepath, sampler)
+    if error is not None:
+        return error
 
-            train_results = classifier.train(X_clean, y_clean)
-            classifier.save_model()
+    try:
+        if sampler is not None:
+            df, sampling_report, _ = sampler.sample(filepath)
         else:
-            print("Not enough labeled data for training. Using existing model for prediction.")
+            df = pd.read_csv(filepath)
+            sampling_report = None
+
+        if delta:
+            # Only inserted and changed rows are preprocessed and scored; the
+            # rest of the stored results are reused as-is.
+            if snapshot is None:
+                return jsonify({'error': 'Delta processing needs a trained model'}), 400
+
+            predictor = snapshot.predictor()
+            results_frame, dirty, delta_summary = delta_tracker.update(
+                data.get('catalog') or filepath, df, predictor, snapshot.version
+            )
+            predictions = predictor.records_from_frame(results_frame)
+            if data.get('changes_only'):
+                predictions = [p for p, is_dirty in zip(predictions, dirty) if is_dirty]
             train_results = {'message': 'Using pre-trained model'}
-
-        predictor = ExoplanetPredictor(classifier, preprocessor)
-
-        df_predict = pd.read_csv(filepath)
-        predictions = predictor.predict_batch(df_predict)
+        else:
+            delta_summary = None
+
+            # Training works on private objects and publishes them as a new
+            # snapshot; requests already holding the previous one are unaffected.
+            preprocessor = ExoplanetPreprocessor()
+            X, y = preprocessor.preprocess(df, fit=True)
+
+            already_trained = snapshot is not None and snapshot.dataset_fingerprint == fingerprint
+
+            if y is not None and len(y.dropna()) > 10 and (data.get('retrain') or not already_trained):
+                y_clean = y.dropna()
+                X_clean = X.loc[y_clean.index]
+
+                classifier = ExoplanetClassifier(n_jobs=ticket.threads)
+                train_results = classifier.train(X_clean, y_clean)
+
+                if publish:
+                    similarity_index = SimilarityIndex(**{
+                        key: value for key, value in config['similarity'].items() if key != 'default_k'
+                    }).build(X, df)
+
+                    snapshot = registry.publish(classifier, preprocessor, similarity_index, fingerprint)
+                else:
+                    # Used for this response only; its ETag could never be
+                    # revalidated against the served model
+                    snapshot = InferenceSnapshot(
+                        version=ModelRegistry.new_version(),
+                        classifier=classifier,
+                        preprocessor=preprocessor,
+                        dataset_fingerprint=fingerprint
+                    )
+                    cacheable = False
+            elif snapshot is None:
+                return jsonify({'error': 'Not enough labeled data for training and no pre-trained model available'}), 400
+            elif already_trained:
+                print("Model already trained on this dataset. Using existing model for prediction.")
+                train_results = {'message': 'Using pre-trained model'}
+            else:
+                print("Not enough labeled data for training. Using existing model for prediction.")
+                train_results = {'message': 'Using pre-trained model'}
+
+            predictor = snapshot.predictor()
+
+            predictions = predictor.predict_batch(df, explain=explain)
 
         filtered_predictions = predictor.filter_predictions(predictions, min_confidence=0.3)
 
         galaxy_data = galaxy_generator.generate_galaxy_data(filtered_predictions)
 
-        statistics = preprocessor.get_statistics(df)
+        statistics = snapshot.preprocessor.get_statistics(df)
 
-        return jsonify({
+        if columnar:
+            galaxy_data = {**galaxy_data, 'systems': to_columnar(galaxy_data['systems'])}
+
+        return json_response({
             'success': True,
-            'predictions': filtered_predictions,
+            'predictions': to_columnar(filtered_predictions) if columnar else filtered_predictions,
             'galaxy_data': galaxy_data,
             'statistics': statistics,
             'training_results': train_results,
             'total_predictions': len(predictions),
-            'filtered_predictions': len(filtered_predictions)
-        })
+            'filtered_predictions': len(filtered_predictions),
+            'model_version': snapshot.version,
+            'sampling': sampling_report,
+            'delta': delta_summary
+        }, etag=make_etag('process', fingerprint, snapshot.version, *response_variant) if cacheable else None)
 
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+    finally:
+        admission.release(ticket)
+
 @app.route('/api/eda', methods=['POST'])
 def perform_eda():
     data = request.json
@@ -126,12 +393,129 @@ def perform_eda():
         return jsonify({'error': 'Invalid file path'}), 400
 
     try:
-        df = pd.read_csv(filepath)
-        report = EDAUtils.generate_full_report(df)
+        sampler = auto_sampler(filepath, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        return jsonify({
+    etag = make_etag('eda', upload_handler.fingerprint(filepath), sampler.sample_size if sampler else None)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    ticket, error = admit_or_error('eda', filepath, sampler)
+    if error is not None:
+        return error
+
+    try:
+        if sampler is not None:
+            report = EDAUtils.generate_sampled_report(filepath, sampler)
+        else:
+            df = pd.read_csv(filepath)
+            report = EDAUtils.generate_full_report(df)
+
+        return json_response({
             'success': True,
             'report': report
+        }, etag=etag)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    finally:
+        admission.release(ticket)
+
+@app.route('/api/importance', methods=['GET'])
+def feature_importance():
+    snapshot = registry.current()
+
+    if snapshot is None or snapshot.classifier.validation_data is None:
+        return jsonify({'error': 'No trained model with validation data available'}), 400
+
+    n_repeats = request.args.get('n_repeats', type=int)
+    etag = make_etag('importance', snapshot.version, n_repeats)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+
+    X_val, y_val = snapshot.classifier.validation_data
+
+    # Results are cached per model version; only a fresh computation is
+    # admitted, with its worker count capped to the cores granted
+    ticket = None
+    if importance_service.cached(snapshot.version, n_repeats) is None:
+        memory = admission.estimate('importance', 0, len(X_val), X_val.shape[1],
+                                    rows_used=importance_service.max_rows)
+        try:
+            ticket = admission.acquire('importance', memory)
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+    try:
+        result = importance_service.permutation_importance(
+            snapshot.classifier.model, X_val, y_val,
+            snapshot.preprocessor.feature_names, snapshot.version,
+            n_repeats=n_repeats,
+            n_jobs=ticket.threads if ticket is not None else None
+        )
+
+        return json_response({
+            'success': True,
+            'permutation_importance': result,
+            'impurity_importance': snapshot.classifier.get_feature_importance(snapshot.preprocessor.feature_names)
+        }, etag=etag)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    finally:
+        admission.release(ticket)
+
+@app.route('/api/similar', methods=['POST'])
+def find_similar():
+    data = request.json or {}
+
+    snapshot = registry.current()
+    similarity_index = snapshot.similarity_index if snapshot is not None else None
+
+    if similarity_index is None:
+        return jsonify({'error': 'Similarity index not built yet. Process a dataset first.'}), 400
+
+    try:
+        k = int(data.get('k', config['similarity']['default_k']))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'k must be an integer'}), 400
+    if k < 1:
+        return jsonify({'error': 'k must be at least 1'}), 400
+
+    classification = data.get('classification')
+    if classification is not None and similarity_index.normalize_label(classification) not in similarity_index.partitions:
+        return jsonify({
+            'error': f"Unknown classification: {classification}",
+            'available': sorted(similarity_index.partitions)
+        }), 400
+
+    try:
+        start = time.time()
+
+        if data.get('name') is not None:
+            row = similarity_index.row_for_name(str(data['name']))
+            if row is None:
+                return jsonify({'error': f"Unknown object: {data['name']}"}), 404
+
+            neighbours = similarity_index.query(
+                similarity_index.X[row], k=k, classification=classification, exclude=row
+            )[0]
+        elif data.get('features'):
+            query_df = pd.DataFrame([data['features']]).reindex(columns=similarity_index.feature_names)
+            X, _ = snapshot.preprocessor.preprocess(query_df, fit=False)
+            neighbours = similarity_index.query(X.to_numpy(), k=k, classification=classification)[0]
+        else:
+            return jsonify({'error': 'Provide either an object name or features'}), 400
+
+        return json_response({
+            'success': True,
+            'neighbours': neighbours,
+            'mode': similarity_index.mode,
+            'model_version': snapshot.version,
+            'query_time_ms': (time.time() - start) * 1000
         })
 
     except Exception as e:
@@ -139,11 +523,20 @@ def perform_eda():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    snapshot = registry.current()
+
     return jsonify({
         'status': 'healthy',
-        'model_loaded': classifier.model is not None
+        'model_loaded': snapshot is not None,
+        'model_version': snapshot.version if snapshot is not None else None,
+        'admission': admission.status()
     })
 
 if __name__ == '__main__':
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(
+        debug=os.environ.get('FLASK_DEBUG', '1') == '1',
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', 5000)),
+        threaded=True
+    )
@@ -0,0 +1,380 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SCENARIO = {
+    'name': 'default',
+    'clients': 8,
+    'duration': 60,
+    'rows': 5000,
+    'catalogs': 4,
+    'mix': {'upload': 2, 'process': 1, 'eda': 1, 'health': 6},
+    'rss_interval': 1.0,
+    'seed': 42
+}
+
+FEATURES = {
+    'koi_period': (1.5, 1.0),
+    'koi_time0bk': (5.0, 0.05),
+    'koi_impact': (-0.7, 0.6),
+    'koi_duration': (1.2, 0.5),
+    'koi_depth': (6.5, 1.5),
+    'koi_prad': (0.8, 0.9),
+    'koi_teq': (6.8, 0.4),
+    'koi_insol': (4.0, 2.0),
+    'koi_steff': (8.6, 0.1),
+    'koi_slogg': (1.5, 0.05),
+    'koi_srad': (0.0, 0.3),
+}
+
+def make_catalog(path, rows, seed, labeled=True):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'kepoi_name': [f"K{seed:03d}{i:06d}.01" for i in range(rows)]
+    })
+    for col, (mu, sigma) in FEATURES.items():
+        df[col] = np.round(np.exp(rng.normal(mu, sigma, rows)), 4)
+    df['ra'] = rng.uniform(280, 300, rows)
+    df['dec'] = rng.uniform(36, 52, rows)
+    if labeled:
+        df['koi_disposition'] = rng.choice(['CONFIRMED', 'CANDIDATE', 'FALSE POSITIVE'], rows, p=[0.3, 0.3, 0.4])
+
+    # Sprinkle missing values like the real archive tables
+    for col in ['koi_impact', 'koi_teq', 'koi_insol']:
+        df.loc[rng.random(rows) < 0.03, col] = np.nan
+
+    df.to_csv(path, index=False)
+    return path
+
+class ApiClient:
+    def __init__(self, base_url, timeout=600):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, headers=None):
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers or {})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status = e.code
+        except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+            payload = str(e).encode('utf-8')
+            status = 0
+        return status, time.perf_counter() - start, payload
+
+    def post_json(self, path, data):
+        return self.request('POST', path, json.dumps(data).encode('utf-8'),
+                            {'Content-Type': 'application/json'})
+
+    def upload(self, filepath):
+        boundary = uuid.uuid4().hex
+        with open(filepath, 'rb') as f:
+            content = f.read()
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            f'Content-Disposition: form-data; name="file"; filename="{Path(filepath).name}"\r\n'.encode(),
+            b'Content-Type: text/csv\r\n\r\n',
+            content,
+            f'\r\n--{boundary}--\r\n'.encode()
+        ])
+        return self.request('POST', '/api/upload', body,
+                            {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+class ServerProcess:
+    def __init__(self, port, log_path):
+        self.port = port
+        self.log_path = log_path
+        self.process = None
+        self._log = None
+
+    def start(self, timeout=120):
+        env = dict(os.environ, PORT=str(self.port), FLASK_DEBUG='0')
+        self._log = open(self.log_path, 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, 'app/run.py'], cwd=ROOT, env=env,
+            stdout=self._log, stderr=subprocess.STDOUT
+        )
+
+        client = ApiClient(f"http://127.0.0.1:{self.port}", timeout=5)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited early; see {self.log_path}")
+            status, _, _ = client.request('GET', '/api/health')
+            if status == 200:
+                return
+            time.sleep(0.5)
+        raise RuntimeError(f"Server did not become healthy within {timeout}s")
+
+    def rss_bytes(self):
+        if self.process is None:
+            return None
+        try:
+            with open(f"/proc/{self.process.pid}/status", 'r') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+class LoadTest:
+    def __init__(self, scenario, base_url, work_dir):
+        self.scenario = scenario
+        self.client = ApiClient(base_url)
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        self.records = []
+        self.rss = []
+        self.filepaths = []
+        self.catalogs = []
+        self._lock = threading.Lock()
+
+    def prepare(self):
+        # Only the first catalog is labeled. /api/process retrains whenever it
+        # sees a labeled dataset other than the one the current model was
+        # trained on, so the others are unlabeled and 'process' measures
+        # serving. The 'retrain' endpoint measures training explicitly.
+        for i in range(self.scenario['catalogs']):
+            labeled = i == 0
+            path = self.work_dir / f"synthetic_{self.scenario['rows']}_{i}{'' if labeled else '_unlabeled'}.csv"
+            if not path.exists():
+                make_catalog(path, self.scenario['rows'], self.scenario['seed'] + i, labeled=labeled)
+            self.catalogs.append(path)
+
+            status, _, payload = self.client.upload(path)
+            if status != 200:
+                raise RuntimeError(f"Seed upload failed ({status}): {payload[:200]!r}")
+            self.filepaths.append(json.loads(payload)['filepath'])
+
+        status, _, payload = self.client.post_json('/api/process', {'filepath': self.filepaths[0]})
+        if status != 200:
+            raise RuntimeError(f"Seed process failed ({status}): {payload[:200]!r}")
+
+    def _call(self, endpoint, rng):
+        if endpoint == 'upload':
+            return self.client.upload(self.catalogs[rng.integers(len(self.catalogs))])
+        if endpoint == 'process':
+            return self.client.post_json('/api/process', {'filepath': self.filepaths[rng.integers(len(self.filepaths))]})
+        if endpoint == 'retrain':
+            return self.client.post_json('/api/process', {'filepath': self.filepaths[0], 'retrain': True})
+        if endpoint == 'eda':
+            return self.client.post_json('/api/eda', {'filepath': self.filepaths[rng.integers(len(self.filepaths))]})
+        if endpoint == 'health':
+            return self.client.request('GET', '/api/health')
+        raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+
+    def _client_loop(self, client_id, start, deadline):
+        rng = np.random.default_rng(self.scenario['seed'] + 1000 + client_id)
+        endpoints = list(self.scenario['mix'])
+        weights = np.array([self.scenario['mix'][e] for e in endpoints], dtype=float)
+        weights /= weights.sum()
+
+        while time.time() < deadline:
+            endpoint = endpoints[rng.choice(len(endpoints), p=weights)]
+            issued = time.time() - start
+            status, latency, payload = self._call(endpoint, rng)
+            with self._lock:
+                self.records.append({
+                    'client': client_id,
+                    'endpoint': endpoint,
+                    'issued_at': issued,
+                    'latency': latency,
+                    'status': status,
+                    'bytes': len(payload)
+                })
+
+    def _rss_loop(self, server, start, stop_event):
+        while not stop_event.is_set():
+            rss = server.rss_bytes() if server is not None else None
+            if rss is not None:
+                self.rss.append({'t': time.time() - start, 'rss_bytes': rss})
+            stop_event.wait(self.scenario['rss_interval'])
+
+    def run(self, server=None):
+        started_at = datetime.now().isoformat()
+        start = time.time()
+        deadline = start + self.scenario['duration']
+
+        stop_event = threading.Event()
+        sampler = threading.Thread(target=self._rss_loop, args=(server, start, stop_event), daemon=True)
+        sampler.start()
+
+        clients = [
+            threading.Thread(target=self._client_loop, args=(i, start, deadline))
+            for i in range(self.scenario['clients'])
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+
+        elapsed = time.time() - start
+        stop_event.set()
+        sampler.join()
+
+        return self.summarize(elapsed, started_at)
+
+    def summarize(self, elapsed, started_at):
+        df = pd.DataFrame(self.records)
+        endpoints = {}
+
+        if not df.empty:
+            for endpoint, group in df.groupby('endpoint'):
+                latency_ms = group['latency'].to_numpy() * 1000
+                errors = int(((group['status'] < 200) | (group['status'] >= 400)).sum())
+                endpoints[endpoint] = {
+                    'requests': int(len(group)),
+                    'throughput_rps': len(group) / elapsed,
+                    'error_rate': errors / len(group),
+                    'errors': errors,
+                    'latency_ms': {
+                        'mean': float(latency_ms.mean()),
+                        'p50': float(np.percentile(latency_ms, 50)),
+                        'p95': float(np.percentile(latency_ms, 95)),
+                        'p99': float(np.percentile(latency_ms, 99)),
+                        'max': float(latency_ms.max())
+                    },
+                    'mean_response_bytes': float(group['bytes'].mean())
+                }
+
+        rss = [r['rss_bytes'] for r in self.rss]
+        return {
+            'scenario': self.scenario,
+            'started_at': started_at,
+            'elapsed_seconds': elapsed,
+            'total_requests': int(len(df)),
+            'throughput_rps': len(df) / elapsed if elapsed > 0 else 0.0,
+            'endpoints': endpoints,
+            'rss': {
+                'peak_bytes': max(rss) if rss else None,
+                'final_bytes': rss[-1] if rss else None,
+                'samples': self.rss
+            }
+        }
+
+def print_summary(result, baseline=None):
+    print(f"\nScenario '{result['scenario']['name']}': {result['total_requests']} requests in "
+          f"{result['elapsed_seconds']:.1f}s ({result['throughput_rps']:.1f} req/s)")
+    print(f"{'endpoint':<10}{'req':>7}{'rps':>9}{'err%':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for endpoint, stats in sorted(result['endpoints'].items()):
+        latency = stats['latency_ms']
+        print(f"{endpoint:<10}{stats['requests']:>7}{stats['throughput_rps']:>9.2f}"
+              f"{stats['error_rate'] * 100:>7.1f}{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}")
+
+        if baseline and endpoint in baseline['endpoints']:
+            before = baseline['endpoints'][endpoint]
+            print(f"{'  vs base':<10}{'':>7}{stats['throughput_rps'] - before['throughput_rps']:>+9.2f}"
+                  f"{(stats['error_rate'] - before['error_rate']) * 100:>+7.1f}"
+                  f"{latency['p50'] - before['latency_ms']['p50']:>+10.1f}"
+                  f"{latency['p95'] - before['latency_ms']['p95']:>+10.1f}"
+                  f"{latency['p99'] - before['latency_ms']['p99']:>+10.1f}")
+
+    if result['rss']['peak_bytes']:
+        print(f"Server RSS: peak {result['rss']['peak_bytes'] / 1e6:.0f}MB, "
+              f"final {result['rss']['final_bytes'] / 1e6:.0f}MB")
+
+def load_scenario(args):
+    scenario = dict(DEFAULT_SCENARIO)
+    if args.scenario:
+        with open(args.scenario, 'r') as f:
+            scenario.update(yaml.safe_load(f))
+
+    for key in ('clients', 'duration', 'rows', 'catalogs'):
+        if getattr(args, key) is not None:
+            scenario[key] = getattr(args, key)
+    if args.mix:
+        scenario['mix'] = {
+            name: float(weight) for name, weight in (item.split('=') for item in args.mix.split(','))
+        }
+    if args.name:
+        scenario['name'] = args.name
+
+    return scenario
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent load test for the exoplanet API')
+    parser.add_argument('--scenario', help='YAML/JSON scenario file')
+    parser.add_argument('--name', help='Scenario name used for the results file')
+    parser.add_argument('--clients', type=int, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, help='Test duration in seconds')
+    parser.add_argument('--rows', type=int, help='Rows per synthetic catalog')
+    parser.add_argument('--catalogs', type=int, help='Number of synthetic catalogs')
+    parser.add_argument('--mix', help='Endpoint weights over upload, process, retrain, eda and health, '
+                        'e.g. upload=2,process=1,eda=1,health=6')
+    parser.add_argument('--url', help='Target an already running server instead of starting one')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the locally started server')
+    parser.add_argument('--output', default='data/processed/load_tests', help='Results directory')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args)
+    output_dir = ROOT / args.output
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    server = None
+    try:
+        if args.url:
+            base_url = args.url
+        else:
+            # Started inside the try so a failed health wait still stops the
+            # process and frees the port
+            server = ServerProcess(args.port, output_dir / 'server.log')
+            print(f"Starting app/run.py on port {args.port}...")
+            server.start()
+            base_url = f"http://127.0.0.1:{args.port}"
+
+        test = LoadTest(scenario, base_url, output_dir / 'catalogs')
+        print(f"Preparing {scenario['catalogs']} synthetic catalogs of {scenario['rows']} rows...")
+        test.prepare()
+        print(f"Running {scenario['clients']} clients for {scenario['duration']}s with mix {scenario['mix']}...")
+        result = test.run(server)
+    finally:
+        if server is not None:
+            server.stop()
+
+    result_path = output_dir / f"{scenario['name']}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(result_path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    print_summary(result, baseline)
+    print(f"\nResults saved to {result_path}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,6 +20,15 @@ setup(
         'pyyaml>=6.0.1',
         'python-dotenv>=1.0.0',
     ],
+    extras_require={
+        'fast': [
+            'orjson>=3.9.0',
+            'brotli>=1.1.0',
+        ],
+        'parquet': [
+            'pyarrow>=12.0.0',
+        ],
+    },
     python_requires='>=3.8',
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -34,6 +43,7 @@ setup(
     entry_points={
         'console_scripts': [
             'exoplanet-detector=app.run:main',
+            'exoplanet-score=src.models.batch_score:main',
         ],
     },
 )
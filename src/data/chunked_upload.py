@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+
+class ChunkedUploadError(Exception):
+    pass
+
+
+class ChunkedUploadManager:
+    def __init__(self, upload_folder='data/uploads', chunk_size=8 * 1024 * 1024,
+                 max_file_size=20 * 1024 * 1024 * 1024, min_chunk_size=1024 * 1024,
+                 max_chunk_size=100 * 1024 * 1024, max_chunks=10000, session_ttl=24 * 3600):
+        self.upload_folder = Path(upload_folder)
+        self.staging_folder = self.upload_folder / '.chunked'
+        self.staging_folder.mkdir(parents=True, exist_ok=True)
+
+        self.chunk_size = chunk_size
+        self.max_file_size = max_file_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_chunks = max_chunks
+        self.session_ttl = session_ttl
+
+        # Sessions being finalized or aborted accept no more chunks, and a
+        # session with chunk writes in flight cannot be finalized
+        self._lock = threading.Lock()
+        self._writers = {}
+        self._closing = set()
+
+    def _session_dir(self, upload_id):
+        try:
+            uuid.UUID(upload_id)
+        except (ValueError, TypeError):
+            raise ChunkedUploadError(f"Unknown upload id: {upload_id}")
+
+        session_dir = self.staging_folder / upload_id
+        if not session_dir.exists():
+            raise ChunkedUploadError(f"Unknown upload id: {upload_id}")
+        return session_dir
+
+    def _load_manifest(self, session_dir):
+        with open(session_dir / 'manifest.json', 'r') as f:
+            return json.load(f)
+
+    def initiate(self, filename, total_size, checksum, chunk_size=None):
+        try:
+            chunk_size = int(chunk_size or self.chunk_size)
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            raise ChunkedUploadError("total_size and chunk_size must be integers")
+
+        if not isinstance(checksum, str) or not re.fullmatch(r'[0-9a-fA-F]{64}', checksum):
+            raise ChunkedUploadError("checksum must be a hex-encoded SHA-256 digest")
+        if total_size <= 0:
+            raise ChunkedUploadError("total_size must be positive")
+        if total_size > self.max_file_size:
+            raise ChunkedUploadError(f"File exceeds maximum size of {self.max_file_size} bytes")
+
+        # Every chunk must fit in one request body, and the chunk count has to
+        # stay small enough to list in status()
+        chunk_size = min(max(chunk_size, self.min_chunk_size), self.max_chunk_size)
+        chunk_size = max(chunk_size, -(-total_size // self.max_chunks))
+        if chunk_size > self.max_chunk_size:
+            raise ChunkedUploadError(
+                f"File needs more than {self.max_chunks} chunks of at most {self.max_chunk_size} bytes"
+            )
+
+        self.expire_sessions()
+
+        upload_id = str(uuid.uuid4())
+        session_dir = self.staging_folder / upload_id
+        (session_dir / 'received').mkdir(parents=True)
+
+        manifest = {
+            'upload_id': upload_id,
+            'filename': filename,
+            'total_size': total_size,
+            'chunk_size': chunk_size,
+            'total_chunks': (total_size + chunk_size - 1) // chunk_size,
+            'checksum': checksum.lower(),
+            'created_at': datetime.now().isoformat()
+        }
+
+        with open(session_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f)
+
+        # Preallocate the target so chunks can be written in place at their
+        # offsets, in any order and from concurrent requests.
+        with open(session_dir / 'data.part', 'wb') as f:
+            f.truncate(total_size)
+
+        return manifest
+
+    def _start_write(self, upload_id):
+        with self._lock:
+            if upload_id in self._closing:
+                raise ChunkedUploadError(f"Upload {upload_id} is being finalized or aborted")
+            self._writers[upload_id] = self._writers.get(upload_id, 0) + 1
+
+    def _end_write(self, upload_id):
+        with self._lock:
+            self._writers[upload_id] -= 1
+            if not self._writers[upload_id]:
+                del self._writers[upload_id]
+
+    def _close(self, upload_id):
+        with self._lock:
+            if upload_id in self._closing:
+                raise ChunkedUploadError(f"Upload {upload_id} is already being finalized or aborted")
+            if self._writers.get(upload_id):
+                raise ChunkedUploadError(f"Upload {upload_id} still has chunks being written")
+            self._closing.add(upload_id)
+
+    def _reopen(self, upload_id):
+        with self._lock:
+            self._closing.discard(upload_id)
+
+    def write_chunk(self, upload_id, index, stream, block_size=1024 * 1024):
+        session_dir = self._session_dir(upload_id)
+        self._start_write(upload_id)
+        try:
+            return self._write_chunk(session_dir, index, stream, block_size)
+        finally:
+            self._end_write(upload_id)
+
+    def _write_chunk(self, session_dir, index, stream, block_size):
+        manifest = self._load_manifest(session_dir)
+
+        if index < 0 or index >= manifest['total_chunks']:
+            raise ChunkedUploadError(f"Chunk index {index} out of range")
+
+        offset = index * manifest['chunk_size']
+        expected = min(manifest['chunk_size'], manifest['total_size'] - offset)
+
+        written = 0
+        with open(session_dir / 'data.part', 'r+b') as f:
+            f.seek(offset)
+            while written < expected:
+                block = stream.read(min(block_size, expected - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+
+            if stream.read(1):
+                raise ChunkedUploadError(f"Chunk {index} is larger than {expected} bytes")
+
+        if written != expected:
+            raise ChunkedUploadError(f"Chunk {index} incomplete: received {written} of {expected} bytes")
+
+        (session_dir / 'received' / str(index)).touch()
+
+        return {'index': index, 'offset': offset, 'size': written}
+
+    def status(self, upload_id):
+        session_dir = self._session_dir(upload_id)
+        manifest = self._load_manifest(session_dir)
+
+        received = sorted(int(p.name) for p in (session_dir / 'received').iterdir())
+        received_set = set(received)
+        missing = [i for i in range(manifest['total_chunks']) if i not in received_set]
+
+        return {
+            'upload_id': upload_id,
+            'filename': manifest['filename'],
+            'total_size': manifest['total_size'],
+            'chunk_size': manifest['chunk_size'],
+            'total_chunks': manifest['total_chunks'],
+            'received_chunks': received,
+            'received_offsets': [i * manifest['chunk_size'] for i in received],
+            'missing_chunks': missing,
+            'complete': not missing
+        }
+
+    def staged_path(self, upload_id):
+        return self._session_dir(upload_id) / 'data.part'
+
+    def finalize(self, upload_id):
+        session_dir = self._session_dir(upload_id)
+        self._close(upload_id)
+
+        try:
+            manifest = self._load_manifest(session_dir)
+
+            status = self.status(upload_id)
+            if not status['complete']:
+                raise ChunkedUploadError(
+                    f"Upload incomplete: {len(status['missing_chunks'])} chunks missing"
+                )
+
+            part_path = session_dir / 'data.part'
+            digest = self.file_checksum(part_path)
+            if digest != manifest['checksum']:
+                raise ChunkedUploadError(
+                    f"Checksum mismatch: expected {manifest['checksum']}, got {digest}"
+                )
+
+            # Linking fails instead of overwriting if the name is taken
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filepath = self.upload_folder / f"upload_{timestamp}_{upload_id[:8]}_{manifest['filename']}"
+            os.link(part_path, filepath)
+            shutil.rmtree(session_dir, ignore_errors=True)
+        except Exception:
+            # A failed finalize keeps the session so missing or corrupt chunks
+            # can be re-sent
+            self._reopen(upload_id)
+            raise
+
+        self._reopen(upload_id)
+        return filepath, digest
+
+    def abort(self, upload_id):
+        session_dir = self._session_dir(upload_id)
+        self._close(upload_id)
+        try:
+            shutil.rmtree(session_dir, ignore_errors=True)
+        finally:
+            self._reopen(upload_id)
+
+    def expire_sessions(self):
+        # Abandoned sessions each hold a preallocated file; drop those with no
+        # chunk written for session_ttl seconds
+        cutoff = time.time() - self.session_ttl
+        expired = []
+        for session_dir in self.staging_folder.iterdir():
+            try:
+                last_activity = (session_dir / 'data.part').stat().st_mtime
+            except OSError:
+                last_activity = session_dir.stat().st_mtime
+            if last_activity >= cutoff:
+                continue
+
+            try:
+                self._close(session_dir.name)
+            except ChunkedUploadError:
+                continue
+            try:
+                shutil.rmtree(session_dir, ignore_errors=True)
+                expired.append(session_dir.name)
+            finally:
+                self._reopen(session_dir.name)
+
+        if expired:
+            print(f"Expired {len(expired)} abandoned chunked uploads")
+        return expired
+
+    @staticmethod
+    def file_checksum(filepath, block_size=4 * 1024 * 1024):
+        sha = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                sha.update(block)
+        return sha.hexdigest()
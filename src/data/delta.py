@@ -0,0 +1,151 @@
+import re
+import threading
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from pathlib import Path
+
+HASH_VERSION = 2
+
+class CatalogDeltaTracker:
+    def __init__(self, state_dir='data/processed/delta'):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def catalog_name(filepath):
+        name = Path(filepath).stem
+        name = re.sub(r'^upload_\d{8}_\d{6}_(?:[0-9a-f]{8}_)?', '', name)
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', name) or 'catalog'
+
+    def _lock(self, catalog):
+        with self._locks_guard:
+            return self._locks.setdefault(catalog, threading.Lock())
+
+    def _state_path(self, catalog):
+        return self.state_dir / f"{self.catalog_name(catalog)}.pkl"
+
+    @staticmethod
+    def row_keys(df):
+        if 'kepoi_name' in df.columns:
+            keys = df['kepoi_name'].astype(str)
+        elif 'kepid' in df.columns:
+            keys = 'KOI-' + df['kepid'].astype(str)
+        else:
+            raise ValueError("Delta processing needs a kepoi_name or kepid column")
+
+        # kepid is per star, so several KOIs can share it
+        duplicates = keys.groupby(keys).cumcount()
+        if duplicates.any():
+            keys = keys.where(duplicates == 0, keys + '#' + duplicates.astype(str))
+
+        return pd.Index(keys.to_numpy())
+
+    @staticmethod
+    def row_hashes(df):
+        # Hash values, not dtypes: a single new NaN turns an int column into
+        # float64, which must not make every row look changed
+        normalized = {}
+        for col in sorted(df.columns):
+            values = df[col]
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                normalized[col] = values.astype('float64')
+            else:
+                normalized[col] = values.astype(str).where(values.notna(), '<NA>')
+
+        return pd.util.hash_pandas_object(pd.DataFrame(normalized, index=df.index), index=False).to_numpy()
+
+    def load(self, catalog):
+        path = self._state_path(catalog)
+        if not path.exists():
+            return None
+        return joblib.load(path)
+
+    def save(self, catalog, state):
+        path = self._state_path(catalog)
+        tmp_path = path.with_name(path.name + '.tmp')
+        joblib.dump(state, tmp_path)
+        tmp_path.replace(path)
+
+    @staticmethod
+    def diff(state, keys, hashes):
+        old_keys = state['keys']
+        positions = old_keys.get_indexer(keys)
+
+        inserted = positions == -1
+        changed = np.zeros(len(keys), dtype=bool)
+        changed[~inserted] = state['hashes'][positions[~inserted]] != hashes[~inserted]
+        deleted = old_keys[~old_keys.isin(keys)]
+
+        return inserted, changed, deleted
+
+    def update(self, catalog, df, predictor, model_version):
+        start = time.time()
+
+        if len(df) == 0:
+            raise ValueError("Cannot process an empty catalog")
+
+        with self._lock(self.catalog_name(catalog)):
+            keys = self.row_keys(df)
+            hashes = self.row_hashes(df)
+            state = self.load(catalog)
+
+            full_refresh = (
+                state is None
+                or state['model_version'] != model_version
+                or state['columns'] != list(df.columns)
+                or state.get('hash_version') != HASH_VERSION
+            )
+
+            if full_refresh:
+                inserted = np.ones(len(df), dtype=bool)
+                changed = np.zeros(len(df), dtype=bool)
+                deleted = pd.Index([])
+            else:
+                inserted, changed, deleted = self.diff(state, keys, hashes)
+
+            dirty = inserted | changed
+            if dirty.any():
+                scored = predictor.predict_frame(df[dirty])
+                scored.index = keys[dirty]
+            else:
+                scored = None
+
+            if full_refresh:
+                results = scored
+            else:
+                # Drop deleted and stale rows, then lay the merged results out
+                # in the order of the new upload
+                stale = deleted.append(keys[changed])
+                results = state['results'].drop(index=stale)
+                if scored is not None:
+                    results = pd.concat([results, scored])
+                results = results.reindex(keys)
+
+            self.save(catalog, {
+                'keys': keys,
+                'hashes': hashes,
+                'results': results,
+                'model_version': model_version,
+                'columns': list(df.columns),
+                'hash_version': HASH_VERSION
+            })
+
+        summary = {
+            'catalog': self.catalog_name(catalog),
+            'full_refresh': bool(full_refresh),
+            'inserted': int(inserted.sum()),
+            'changed': int(changed.sum()),
+            'deleted': int(len(deleted)),
+            'unchanged': int(len(df) - dirty.sum()),
+            'delta_time': time.time() - start
+        }
+
+        print(f"Delta for {summary['catalog']}: {summary['inserted']} inserted, "
+              f"{summary['changed']} changed, {summary['deleted']} deleted, {summary['unchanged']} unchanged")
+
+        return results, dirty, summary
@@ -18,29 +18,30 @@ class ExoplanetPreprocessor:
         print(f"Loaded {len(df)} rows from {filepath}")
         return df
 
-    def select_features(self, df):
+    def select_features(self, df, feature_names=None):
         numeric_features = [
             'koi_period', 'koi_time0bk', 'koi_impact', 'koi_duration',
             'koi_depth', 'koi_prad', 'koi_teq', 'koi_insol',
             'koi_steff', 'koi_slogg', 'koi_srad', 'ra', 'dec'
         ]
 
-        available_features = [f for f in numeric_features if f in df.columns]
-
         if 'koi_disposition' in df.columns:
             target = df['koi_disposition']
         else:
             target = None
 
-        X = df[available_features]
-        self.feature_names = available_features
+        if feature_names is None:
+            feature_names = [f for f in numeric_features if f in df.columns]
+            X = df[feature_names]
+        else:
+            X = df.reindex(columns=feature_names)
 
         return X, target
 
-    def handle_missing_values(self, X):
+    def handle_missing_values(self, X, fit=False):
         strategy = self.config['preprocessing']['missing_value_strategy']
 
-        if self.imputer is None:
+        if fit or self.imputer is None:
             self.imputer = SimpleImputer(strategy=strategy)
             X_imputed = self.imputer.fit_transform(X)
         else:
@@ -48,10 +49,10 @@ class ExoplanetPreprocessor:
 
         return pd.DataFrame(X_imputed, columns=X.columns, index=X.index)
 
-    def scale_features(self, X):
+    def scale_features(self, X, fit=False):
         method = self.config['preprocessing']['scaling_method']
 
-        if self.scaler is None:
+        if fit or self.scaler is None:
             if method == 'standard':
                 self.scaler = StandardScaler()
             elif method == 'minmax':
@@ -76,13 +77,20 @@ class ExoplanetPreprocessor:
         return y.map(mapping)
 
     def preprocess(self, df, fit=True):
-        X, y = self.select_features(df)
+        # Only fitting writes to the preprocessor. Transform-only calls are
+        # read-only so a fitted preprocessor can be shared across threads.
+        if fit or self.feature_names is None:
+            X, y = self.select_features(df)
+            self.feature_names = list(X.columns)
+            fit = True
+        else:
+            X, y = self.select_features(df, self.feature_names)
 
         print(f"Selected {len(self.feature_names)} features")
         print(f"Missing values: {X.isnull().sum().sum()}")
 
-        X = self.handle_missing_values(X)
-        X = self.scale_features(X)
+        X = self.handle_missing_values(X, fit=fit)
+        X = self.scale_features(X, fit=fit)
 
         if y is not None:
             y = self.encode_target(y)
@@ -0,0 +1,178 @@
+import time
+import numpy as np
+import pandas as pd
+
+class StratifiedReservoirSampler:
+    def __init__(self, sample_size=50000, strata_column='koi_disposition', chunksize=100000,
+                 random_state=42, z_score=1.96):
+        self.sample_size = sample_size
+        self.strata_column = strata_column
+        self.chunksize = chunksize
+        self.random_state = random_state
+        self.z_score = z_score
+
+    def _strata(self, chunk):
+        if self.strata_column in chunk.columns:
+            return chunk[self.strata_column].fillna('UNLABELED').astype(str)
+        return pd.Series('ALL', index=chunk.index)
+
+    @staticmethod
+    def _keep_smallest(frame, capacity):
+        if len(frame) <= capacity:
+            return frame
+        keep = np.argpartition(frame['_key'].to_numpy(), capacity - 1)[:capacity]
+        return frame.iloc[keep]
+
+    def _allocate(self, populations, reservoirs):
+        total = sum(populations.values())
+        target = min(self.sample_size, total)
+
+        # Proportional allocation (largest remainder), at least one row per
+        # non-empty stratum so rare classes stay represented.
+        exact = {h: target * n / total for h, n in populations.items()}
+        allocation = {h: max(1, int(np.floor(v))) for h, v in exact.items()}
+        remainder = target - sum(allocation.values())
+        for h in sorted(exact, key=lambda h: exact[h] - np.floor(exact[h]), reverse=True):
+            if remainder <= 0:
+                break
+            allocation[h] += 1
+            remainder -= 1
+
+        return {h: min(n, len(reservoirs[h])) for h, n in allocation.items()}
+
+    def sample(self, filepath):
+        start = time.time()
+        rng = np.random.default_rng(self.random_state)
+
+        reservoirs = {}
+        populations = {}
+        numeric_cols = None
+        column_order = None
+        missing = None
+        counts = sums = squares = None
+        minimums = maximums = None
+        total_rows = 0
+
+        for chunk in pd.read_csv(filepath, chunksize=self.chunksize):
+            if numeric_cols is None:
+                column_order = list(chunk.columns)
+                numeric_cols = list(chunk.select_dtypes(include=[np.number]).columns)
+                missing = pd.Series(0, index=chunk.columns)
+                minimums = pd.Series(np.inf, index=numeric_cols)
+                maximums = pd.Series(-np.inf, index=numeric_cols)
+
+            total_rows += len(chunk)
+            missing = missing.add(chunk.isnull().sum(), fill_value=0)
+
+            strata = self._strata(chunk)
+            numeric = chunk[numeric_cols].apply(pd.to_numeric, errors='coerce')
+
+            # Exact per-stratum sufficient statistics for the full file
+            grouped = numeric.groupby(strata)
+            chunk_counts = grouped.count()
+            chunk_sums = grouped.sum()
+            chunk_squares = (numeric ** 2).groupby(strata).sum()
+            if counts is None:
+                counts, sums, squares = chunk_counts, chunk_sums, chunk_squares
+            else:
+                counts = counts.add(chunk_counts, fill_value=0)
+                sums = sums.add(chunk_sums, fill_value=0)
+                squares = squares.add(chunk_squares, fill_value=0)
+            minimums = np.fmin(minimums, numeric.min())
+            maximums = np.fmax(maximums, numeric.max())
+
+            # Reservoir step: every row gets a uniform random key and each
+            # stratum keeps the rows with the smallest keys seen so far.
+            chunk = chunk.assign(_key=rng.random(len(chunk)))
+            for stratum, rows in chunk.groupby(strata):
+                populations[stratum] = populations.get(stratum, 0) + len(rows)
+                if stratum in reservoirs:
+                    rows = pd.concat([reservoirs[stratum], rows])
+                reservoirs[stratum] = self._keep_smallest(rows, self.sample_size)
+
+        if total_rows == 0:
+            raise ValueError(f"No rows found in {filepath}")
+
+        allocation = self._allocate(populations, reservoirs)
+        sample = pd.concat([
+            self._keep_smallest(reservoirs[h], n) for h, n in allocation.items()
+        ]).drop(columns='_key').sort_index()
+
+        full_stats = {
+            'counts': counts, 'sums': sums, 'squares': squares,
+            'min': minimums, 'max': maximums, 'missing': missing.astype(int)
+        }
+
+        report = {
+            'method': 'stratified_reservoir',
+            'strata_column': self.strata_column,
+            'total_rows': int(total_rows),
+            'sample_rows': int(len(sample)),
+            'sampling_time': time.time() - start,
+            'strata': {
+                h: {'population': int(populations[h]), 'sample': int(allocation[h])}
+                for h in populations
+            },
+            'error_bounds': self.error_bounds(sample, numeric_cols, full_stats)
+        }
+
+        sample = sample[column_order]
+        return sample, report, full_stats
+
+    def error_bounds(self, sample, numeric_cols, full_stats):
+        counts, sums, squares = full_stats['counts'], full_stats['sums'], full_stats['squares']
+        strata = self._strata(sample)
+        numeric = sample[numeric_cols].apply(pd.to_numeric, errors='coerce')
+        sample_counts = numeric.groupby(strata).count()
+        sample_means = numeric.groupby(strata).mean()
+        sample_vars = numeric.groupby(strata).var()
+
+        bounds = {}
+        for col in numeric_cols:
+            N_h = counts[col]
+            N = N_h.sum()
+            if N == 0:
+                continue
+
+            full_mean = sums[col].sum() / N
+            full_var = max(squares[col].sum() / N - full_mean ** 2, 0.0)
+
+            n_h = sample_counts[col].reindex(N_h.index).fillna(0)
+            present = n_h > 0
+            W_h = N_h[present] / N_h[present].sum()
+            estimate = float((W_h * sample_means[col].reindex(W_h.index)).sum())
+
+            # Variance of the stratified mean with finite population correction
+            s2_h = sample_vars[col].reindex(W_h.index).fillna(0)
+            fpc = 1 - n_h[present] / N_h[present]
+            variance = float((W_h ** 2 * fpc * s2_h / n_h[present]).sum())
+            half_width = self.z_score * np.sqrt(variance)
+
+            bounds[col] = {
+                'sample_mean': estimate,
+                'full_mean': float(full_mean),
+                'full_std': float(np.sqrt(full_var)),
+                'abs_error': float(abs(estimate - full_mean)),
+                'ci_half_width': float(half_width),
+                'within_bound': bool(abs(estimate - full_mean) <= half_width)
+            }
+
+        return bounds
+
+    @staticmethod
+    def full_numeric_summary(full_stats):
+        summary = {}
+        for col in full_stats['counts'].columns:
+            n = full_stats['counts'][col].sum()
+            if n == 0:
+                summary[col] = {'mean': None, 'std': None, 'min': None, 'max': None}
+                continue
+            mean = full_stats['sums'][col].sum() / n
+            var = max(full_stats['squares'][col].sum() / n - mean ** 2, 0.0) * n / max(n - 1, 1)
+            summary[col] = {
+                'mean': float(mean),
+                'std': float(np.sqrt(var)),
+                'min': float(full_stats['min'][col]),
+                'max': float(full_stats['max'][col])
+            }
+        return summary
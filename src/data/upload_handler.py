@@ -1,7 +1,10 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import hashlib
 import json
+import threading
+import uuid
 from datetime import datetime
 
 class UploadHandler:
@@ -9,9 +12,14 @@ class UploadHandler:
         self.upload_folder = Path(upload_folder)
         self.upload_folder.mkdir(parents=True, exist_ok=True)
 
+        self._fingerprints = {}
+        self._shapes = {}
+        self._fingerprint_lock = threading.Lock()
+
     def save_upload(self, file):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"upload_{timestamp}_{file.filename}"
+        # The short id keeps two uploads in the same second from colliding
+        filename = f"upload_{timestamp}_{uuid.uuid4().hex[:8]}_{file.filename}"
         filepath = self.upload_folder / filename
 
         file.save(str(filepath))
@@ -27,8 +35,12 @@ class UploadHandler:
         except Exception as e:
             return False, str(e)
 
-    def analyze_upload(self, filepath):
+    def analyze_upload(self, filepath, sampler=None):
+        if sampler is not None:
+            return self.analyze_upload_sampled(filepath, sampler)
+
         df = pd.read_csv(filepath)
+        self._remember_shape(filepath, len(df), len(df.columns))
 
         analysis = {
             'total_rows': len(df),
@@ -51,6 +63,98 @@ class UploadHandler:
 
         return analysis
 
+    def analyze_upload_sampled(self, filepath, sampler):
+        sample, report, full_stats = sampler.sample(filepath)
+        self._remember_shape(filepath, report['total_rows'], len(sample.columns))
+
+        # Counts, means, spreads and extremes come from the exact one-pass
+        # statistics; only the medians are estimated from the sample.
+        numeric_summary = sampler.full_numeric_summary(full_stats)
+        for col, summary in numeric_summary.items():
+            summary['median'] = float(sample[col].median()) if not sample[col].isnull().all() else None
+
+        return {
+            'total_rows': report['total_rows'],
+            'total_columns': len(sample.columns),
+            'columns': list(sample.columns),
+            'missing_values': full_stats['missing'].to_dict(),
+            'data_types': sample.dtypes.astype(str).to_dict(),
+            'numeric_summary': numeric_summary,
+            'sampling': report
+        }
+
+    @staticmethod
+    def _fingerprint_path(filepath):
+        return Path(f"{filepath}.sha256.json")
+
+    def remember_fingerprint(self, filepath, digest):
+        key = self._file_key(filepath)
+
+        with self._fingerprint_lock:
+            self._fingerprints[key] = digest
+
+        # A sidecar file shares the digest with other server processes and
+        # survives restarts; it is only trusted while size and mtime match.
+        try:
+            with open(self._fingerprint_path(filepath), 'w') as f:
+                json.dump({'size': key[1], 'mtime_ns': key[2], 'sha256': digest}, f)
+        except OSError:
+            pass
+
+    def fingerprint(self, filepath, block_size=4 * 1024 * 1024):
+        key = self._file_key(filepath)
+
+        with self._fingerprint_lock:
+            if key in self._fingerprints:
+                return self._fingerprints[key]
+
+        try:
+            with open(self._fingerprint_path(filepath), 'r') as f:
+                stored = json.load(f)
+            if (stored['size'], stored['mtime_ns']) == key[1:]:
+                with self._fingerprint_lock:
+                    self._fingerprints[key] = stored['sha256']
+                return stored['sha256']
+        except (OSError, ValueError, KeyError):
+            pass
+
+        sha = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+
+        self.remember_fingerprint(filepath, digest)
+        return digest
+
+    @staticmethod
+    def _file_key(filepath):
+        stat = Path(filepath).stat()
+        return (str(filepath), stat.st_size, stat.st_mtime_ns)
+
+    def _remember_shape(self, filepath, rows, cols):
+        with self._fingerprint_lock:
+            self._shapes[self._file_key(filepath)] = (int(rows), int(cols))
+
+    def shape(self, filepath, probe_bytes=1024 * 1024):
+        key = self._file_key(filepath)
+        with self._fingerprint_lock:
+            if key in self._shapes:
+                return self._shapes[key]
+
+        # Files that were not analysed here are estimated from the header and
+        # the average line length of the first block
+        with open(filepath, 'rb') as f:
+            head = f.read(probe_bytes)
+        lines = head.count(b'\n')
+        cols = len(pd.read_csv(filepath, nrows=0).columns)
+        if lines <= 1 or len(head) < probe_bytes:
+            rows = max(lines - 1, 0)
+        else:
+            rows = int(key[1] / (len(head) / lines))
+
+        return rows, cols
+
     def prepare_for_training(self, filepath):
         df = pd.read_csv(filepath)
 
@@ -0,0 +1,215 @@
+import copy
+import os
+import tempfile
+import threading
+import time
+import warnings
+import weakref
+import numpy as np
+import joblib
+from joblib import Parallel, delayed
+from scipy import sparse
+
+_PATH_MATRIX_CACHE = weakref.WeakKeyDictionary()
+_PATH_MATRIX_LOCK = threading.Lock()
+
+def _permuted_score(model, X, y, feature, seed):
+    X_permuted = np.array(X)
+    X_permuted[:, feature] = np.random.default_rng(seed).permutation(X_permuted[:, feature])
+
+    # Scoped so the worker's (or the caller's) filters are left untouched
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return float(np.mean(model.predict(X_permuted) == y))
+
+def _node_values(tree, normalize):
+    values = tree.value[:, 0, :].astype(np.float64)
+    if normalize:
+        totals = values.sum(axis=1, keepdims=True)
+        values = values / np.where(totals == 0, 1, totals)
+    return values
+
+def _tree_path_matrix(tree, n_features, n_outputs, values, output=None):
+    # Row n holds value[n] - value[parent(n)] in the columns of the feature the
+    # parent split on, so indicator @ matrix sums contributions along a path.
+    children_left = tree.children_left
+    children_right = tree.children_right
+    internal = np.flatnonzero(children_left != -1)
+
+    children = np.concatenate([children_left[internal], children_right[internal]])
+    parents = np.concatenate([internal, internal])
+    split_features = tree.feature[parents]
+
+    deltas = values[children] - values[parents]
+
+    if output is None:
+        rows = np.repeat(children, n_outputs)
+        cols = (split_features[:, None] * n_outputs + np.arange(n_outputs)).ravel()
+        data = deltas.ravel()
+    else:
+        rows = children
+        cols = split_features * n_outputs + output
+        data = deltas[:, 0]
+
+    return sparse.csr_matrix((data, (rows, cols)), shape=(tree.node_count, n_features * n_outputs))
+
+def supports_attribution(model):
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is None or len(estimators) == 0:
+        return False
+    first = estimators.flat[0] if isinstance(estimators, np.ndarray) else estimators[0]
+    return hasattr(first, 'tree_')
+
+def _path_matrix(model):
+    with _PATH_MATRIX_LOCK:
+        cached = _PATH_MATRIX_CACHE.get(model)
+    if cached is not None:
+        return cached
+
+    n_features = model.n_features_in_
+
+    if isinstance(model.estimators_, np.ndarray):
+        # Gradient boosting: one regression tree per stage and class, additive
+        # in log-odds space.
+        n_outputs = model.estimators_.shape[1]
+        trees, matrices = [], []
+        for stage in model.estimators_:
+            for output, estimator in enumerate(stage):
+                values = _node_values(estimator.tree_, normalize=False) * model.learning_rate
+                matrices.append(_tree_path_matrix(estimator.tree_, n_features, n_outputs, values, output))
+                trees.append(estimator)
+        bias = None
+        scale = 1.0
+    else:
+        # Forests: probability averaged over trees.
+        n_outputs = model.n_classes_
+        trees = list(model.estimators_)
+        matrices, roots = [], []
+        for estimator in trees:
+            values = _node_values(estimator.tree_, normalize=True)
+            matrices.append(_tree_path_matrix(estimator.tree_, n_features, n_outputs, values))
+            roots.append(values[0])
+        bias = np.mean(roots, axis=0)
+        scale = 1.0 / len(trees)
+
+    cached = (trees, sparse.vstack(matrices).tocsr() * scale, bias, n_outputs)
+
+    with _PATH_MATRIX_LOCK:
+        _PATH_MATRIX_CACHE[model] = cached
+    return cached
+
+def _block_attributions(model, X, trees, matrix, bias, n_outputs):
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        if bias is None:
+            indicator = sparse.hstack([tree.decision_path(X) for tree in trees]).tocsr()
+            output = model.decision_function(X).reshape(len(X), -1)
+        else:
+            indicator, _ = model.decision_path(X)
+
+    contributions = (indicator @ matrix).toarray().reshape(len(X), model.n_features_in_, n_outputs)
+
+    if bias is None:
+        block_bias = output - contributions.sum(axis=1)
+    else:
+        block_bias = np.broadcast_to(bias, (len(X), n_outputs))
+
+    return contributions, block_bias
+
+def path_attributions(model, X, block_size=10000):
+    if not supports_attribution(model):
+        raise ValueError(f"Per-row attribution is not supported for {type(model).__name__}")
+
+    X = np.asarray(X, dtype=np.float32)
+    trees, matrix, bias, n_outputs = _path_matrix(model)
+
+    # The decision-path indicator has rows x trees x depth entries, so it is
+    # only ever built for one block of rows at a time
+    contributions = np.empty((len(X), model.n_features_in_, n_outputs), dtype=np.float64)
+    biases = np.empty((len(X), n_outputs), dtype=np.float64)
+    for start in range(0, len(X), block_size):
+        block = slice(start, start + block_size)
+        contributions[block], biases[block] = _block_attributions(model, X[block], trees, matrix, bias, n_outputs)
+
+    return contributions, biases
+
+class FeatureImportanceService:
+    def __init__(self, n_repeats=5, n_jobs=-1, max_rows=20000, random_state=42):
+        self.n_repeats = n_repeats
+        self.n_jobs = n_jobs
+        self.max_rows = max_rows
+        self.random_state = random_state
+
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def cached(self, version, n_repeats=None):
+        with self._lock:
+            return self._cache.get((version, n_repeats or self.n_repeats))
+
+    def permutation_importance(self, model, X, y, feature_names, version, n_repeats=None, n_jobs=None):
+        n_repeats = n_repeats or self.n_repeats
+        n_jobs = n_jobs or self.n_jobs
+        key = (version, n_repeats)
+
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        start = time.time()
+
+        X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+        y = np.asarray(y)
+
+        if len(X) > self.max_rows:
+            rows = np.random.default_rng(self.random_state).choice(len(X), self.max_rows, replace=False)
+            X, y = X[rows], y[rows]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            validation_path = os.path.join(tmp_dir, 'validation.joblib')
+            joblib.dump((X, y), validation_path)
+            X_shared, y_shared = joblib.load(validation_path, mmap_mode='r')
+
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore', message='X does not have valid feature names')
+                baseline = float(np.mean(model.predict(X_shared) == y_shared))
+
+            # Workers get a shallow copy limited to one thread, so the pool
+            # does not oversubscribe the cores and the published model is
+            # left untouched when joblib runs in-process.
+            worker_model = model
+            if hasattr(model, 'n_jobs'):
+                worker_model = copy.copy(model)
+                worker_model.n_jobs = 1
+
+            n_features = X.shape[1]
+            scores = Parallel(n_jobs=n_jobs)(
+                delayed(_permuted_score)(
+                    worker_model, X_shared, y_shared, feature,
+                    self.random_state + feature * n_repeats + repeat
+                )
+                for feature in range(n_features)
+                for repeat in range(n_repeats)
+            )
+
+        drops = baseline - np.array(scores).reshape(n_features, n_repeats)
+
+        result = {
+            'model_version': version,
+            'baseline_accuracy': baseline,
+            'n_repeats': n_repeats,
+            'n_samples': int(len(X)),
+            'computation_time': time.time() - start,
+            'importances': {
+                name: {
+                    'importance_mean': float(drops[i].mean()),
+                    'importance_std': float(drops[i].std())
+                }
+                for i, name in enumerate(feature_names)
+            }
+        }
+
+        with self._lock:
+            self._cache[key] = result
+
+        return result
@@ -4,6 +4,207 @@ from sklearn.metrics import (
 )
 import numpy as np
 
+CLASS_NAMES = ['FALSE_POSITIVE', 'CANDIDATE', 'CONFIRMED']
+
+class StreamingEvaluator:
+    # Sufficient statistics for chunked evaluation: a confusion matrix and,
+    # per class, histograms of that class's probability split by whether the
+    # row truly belongs to it. Evaluators from different chunks or processes
+    # can be merged by adding the counts.
+    def __init__(self, n_classes=3, bins=1000, class_names=None):
+        self.n_classes = n_classes
+        self.bins = bins
+        self.class_names = class_names or CLASS_NAMES[:n_classes]
+
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.positive_hist = np.zeros((n_classes, bins), dtype=np.int64)
+        self.negative_hist = np.zeros((n_classes, bins), dtype=np.int64)
+
+    @property
+    def n_samples(self):
+        return int(self.confusion.sum())
+
+    def _labels(self, values, name):
+        # Out-of-range labels would silently land in another cell of the
+        # flattened confusion counts, so they are rejected outright
+        values = np.asarray(values)
+        if values.dtype.kind == 'f':
+            if not np.isfinite(values).all() or (values != np.round(values)).any():
+                raise ValueError(f"{name} must hold integer class indices, not NaN or fractions")
+        elif values.dtype.kind not in 'iub':
+            raise ValueError(f"{name} must hold integer class indices, got dtype {values.dtype}")
+
+        values = values.astype(np.int64)
+        if values.size and (values.min() < 0 or values.max() >= self.n_classes):
+            raise ValueError(f"{name} must lie in [0, {self.n_classes}), got values from {values.min()} to {values.max()}")
+        return values
+
+    def update(self, y_true, y_pred, y_proba=None):
+        y_true = self._labels(y_true, 'y_true')
+        y_pred = self._labels(y_pred, 'y_pred')
+        C = self.n_classes
+
+        if y_true.shape != y_pred.shape:
+            raise ValueError(f"y_true and y_pred have different lengths: {len(y_true)} and {len(y_pred)}")
+
+        self.confusion += np.bincount(y_true * C + y_pred, minlength=C * C).reshape(C, C)
+
+        if y_proba is not None:
+            y_proba = np.asarray(y_proba, dtype=np.float64)
+            bin_index = np.clip((y_proba * self.bins).astype(np.int64), 0, self.bins - 1)
+            flat = bin_index + np.arange(C) * self.bins
+            positive = y_true[:, None] == np.arange(C)
+
+            self.positive_hist += np.bincount(flat[positive], minlength=C * self.bins).reshape(C, self.bins)
+            self.negative_hist += np.bincount(flat[~positive], minlength=C * self.bins).reshape(C, self.bins)
+
+        return self
+
+    def merge(self, other):
+        if (other.n_classes, other.bins) != (self.n_classes, self.bins):
+            raise ValueError("Cannot merge evaluators with different classes or bins")
+
+        self.confusion += other.confusion
+        self.positive_hist += other.positive_hist
+        self.negative_hist += other.negative_hist
+        return self
+
+    def save(self, path):
+        np.savez(path, confusion=self.confusion, positive_hist=self.positive_hist,
+                 negative_hist=self.negative_hist, class_names=np.array(self.class_names))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as counts:
+            evaluator = cls(n_classes=counts['confusion'].shape[0], bins=counts['positive_hist'].shape[1],
+                            class_names=[str(name) for name in counts['class_names']])
+            evaluator.confusion += counts['confusion']
+            evaluator.positive_hist += counts['positive_hist']
+            evaluator.negative_hist += counts['negative_hist']
+        return evaluator
+
+    @staticmethod
+    def _divide(a, b):
+        return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape), where=b > 0)
+
+    @classmethod
+    def _scores(cls, confusion):
+        # Works on a single (C, C) matrix or a stack of (B, C, C) resamples
+        tp = np.diagonal(confusion, axis1=-2, axis2=-1).astype(np.float64)
+        support = confusion.sum(axis=-1).astype(np.float64)
+        predicted = confusion.sum(axis=-2).astype(np.float64)
+        total = support.sum(axis=-1)
+
+        precision = cls._divide(tp, predicted)
+        recall = cls._divide(tp, support)
+        f1 = cls._divide(2 * precision * recall, precision + recall)
+        weights = cls._divide(support, np.asarray(total)[..., None])
+
+        return {
+            'accuracy': cls._divide(tp.sum(axis=-1), total),
+            'precision': (weights * precision).sum(axis=-1),
+            'recall': (weights * recall).sum(axis=-1),
+            'f1_score': (weights * f1).sum(axis=-1),
+            'per_class': (precision, recall, f1, support)
+        }
+
+    @staticmethod
+    def _auc(positive, negative):
+        # Probability that a positive outranks a negative, counting pairs in
+        # the same bin as ties. Exact up to the histogram resolution.
+        negatives_below = np.cumsum(negative, axis=-1) - negative
+        pairs = (positive * (negatives_below + 0.5 * negative)).sum(axis=-1)
+        n_pairs = positive.sum(axis=-1) * negative.sum(axis=-1)
+        return np.divide(pairs, n_pairs, out=np.full(np.shape(pairs), np.nan), where=n_pairs > 0)
+
+    def _weighted_auc(self, positive, negative):
+        aucs = self._auc(positive.astype(np.float64), negative.astype(np.float64))
+        support = positive.sum(axis=-1).astype(np.float64)
+        present = ~np.isnan(aucs)
+        weights = np.where(present, support, 0)
+        return (np.where(present, aucs, 0) * weights).sum(axis=-1) / weights.sum(axis=-1)
+
+    def has_probabilities(self):
+        return self.positive_hist.sum() > 0
+
+    def compute(self):
+        if self.n_samples == 0:
+            raise ValueError("No samples have been added to the evaluator")
+
+        scores = self._scores(self.confusion)
+        precision, recall, f1, support = scores['per_class']
+
+        metrics = {
+            'accuracy': float(scores['accuracy']),
+            'precision': float(scores['precision']),
+            'recall': float(scores['recall']),
+            'f1_score': float(scores['f1_score']),
+            'confusion_matrix': self.confusion.tolist()
+        }
+
+        report = {}
+        for i, name in enumerate(self.class_names):
+            report[name] = {
+                'precision': float(precision[i]),
+                'recall': float(recall[i]),
+                'f1-score': float(f1[i]),
+                'support': float(support[i])
+            }
+        report['accuracy'] = metrics['accuracy']
+        report['macro avg'] = {
+            'precision': float(precision.mean()),
+            'recall': float(recall.mean()),
+            'f1-score': float(f1.mean()),
+            'support': float(support.sum())
+        }
+        report['weighted avg'] = {
+            'precision': metrics['precision'],
+            'recall': metrics['recall'],
+            'f1-score': metrics['f1_score'],
+            'support': float(support.sum())
+        }
+        metrics['classification_report'] = report
+
+        if self.has_probabilities() and (support > 0).sum() > 2:
+            metrics['roc_auc'] = float(self._weighted_auc(self.positive_hist, self.negative_hist))
+
+        return metrics
+
+    def confidence_intervals(self, n_bootstrap=1000, confidence=0.95, random_state=42):
+        # Resampling n rows with replacement is the same as drawing the
+        # confusion cell counts from a multinomial, so each bootstrap replicate
+        # costs O(C^2) instead of a pass over the data.
+        rng = np.random.default_rng(random_state)
+        n = self.n_samples
+        if n == 0:
+            raise ValueError("No samples have been added to the evaluator")
+
+        cells = self.confusion.ravel() / n
+        resampled = rng.multinomial(n, cells, size=n_bootstrap).reshape(-1, self.n_classes, self.n_classes)
+        scores = self._scores(resampled)
+
+        replicates = {name: scores[name] for name in ('accuracy', 'precision', 'recall', 'f1_score')}
+
+        if self.has_probabilities():
+            # Stratified by class: positives and negatives of each one-vs-rest
+            # problem are resampled from their own histograms
+            positive = np.stack([
+                rng.multinomial(h.sum(), h / max(h.sum(), 1), size=n_bootstrap) for h in self.positive_hist
+            ], axis=1)
+            negative = np.stack([
+                rng.multinomial(h.sum(), h / max(h.sum(), 1), size=n_bootstrap) for h in self.negative_hist
+            ], axis=1)
+            replicates['roc_auc'] = self._weighted_auc(positive, negative)
+
+        alpha = (1 - confidence) / 2
+        return {
+            name: {
+                'lower': float(np.nanquantile(values, alpha)),
+                'upper': float(np.nanquantile(values, 1 - alpha))
+            }
+            for name, values in replicates.items()
+        }
+
 class ModelEvaluator:
     def __init__(self):
         self.metrics = {}
@@ -18,7 +219,7 @@ class ModelEvaluator:
 
         self.metrics['classification_report'] = classification_report(
             y_true, y_pred,
-            target_names=['FALSE_POSITIVE', 'CANDIDATE', 'CONFIRMED'],
+            target_names=CLASS_NAMES,
             output_dict=True
         )
 
@@ -30,6 +231,22 @@ class ModelEvaluator:
 
         return self.metrics
 
+    def evaluate_stream(self, chunks, bins=1000, n_bootstrap=0, confidence=0.95):
+        # chunks yields (y_true, y_pred) or (y_true, y_pred, y_proba) tuples
+        streaming = StreamingEvaluator(bins=bins)
+        for chunk in chunks:
+            streaming.update(*chunk)
+
+        return self.evaluate_accumulated(streaming, n_bootstrap=n_bootstrap, confidence=confidence)
+
+    def evaluate_accumulated(self, streaming, n_bootstrap=0, confidence=0.95):
+        self.metrics = streaming.compute()
+        if n_bootstrap:
+            self.metrics['confidence_intervals'] = streaming.confidence_intervals(
+                n_bootstrap=n_bootstrap, confidence=confidence
+            )
+        return self.metrics
+
     def get_summary(self):
         summary = {
             'accuracy': self.metrics.get('accuracy', 0),
@@ -50,5 +267,9 @@ class ModelEvaluator:
         if 'roc_auc' in self.metrics:
             print(f"ROC AUC:   {self.metrics['roc_auc']:.4f}")
 
+        intervals = self.metrics.get('confidence_intervals', {})
+        for name, interval in intervals.items():
+            print(f"  {name} CI: [{interval['lower']:.4f}, {interval['upper']:.4f}]")
+
         print("\nConfusion Matrix:")
         print(np.array(self.metrics.get('confusion_matrix', [])))
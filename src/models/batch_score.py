@@ -0,0 +1,302 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+import pandas as pd
+
+from src.evaluation.metrics import ModelEvaluator, StreamingEvaluator
+from src.models.registry import ModelRegistry
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+    pq = None
+
+SUPPORTED_SUFFIXES = ('.csv', '.parquet')
+
+_worker_predictor = None
+
+def _require_fitted(preprocessor, bundle_path):
+    # A bundle migrated from a legacy model has no fitted preprocessor, and
+    # every worker would refit one on each chunk it scores
+    if preprocessor.feature_names is None:
+        raise ValueError(
+            f"{bundle_path} was migrated from a legacy model and has no fitted preprocessor; "
+            "retrain first so batch scoring uses the training features"
+        )
+
+def _init_worker(bundle_path, config_path):
+    global _worker_predictor
+
+    # Workers only need the model and preprocessor, not the similarity index
+    # or validation split stored in the same bundle
+    snapshot = ModelRegistry.load_snapshot(bundle_path, config_path, include_extras=False)
+    _require_fitted(snapshot.preprocessor, bundle_path)
+
+    # One model copy per process; keep each single-threaded so the pool, not
+    # the estimator, decides how many cores are busy.
+    if hasattr(snapshot.classifier.model, 'n_jobs'):
+        snapshot.classifier.model.n_jobs = 1
+
+    _worker_predictor = snapshot.predictor()
+
+def _write_part(results, part_path, output_format):
+    tmp_path = part_path.with_name(part_path.name + '.tmp')
+    if output_format == 'parquet':
+        results.to_parquet(tmp_path, index=False)
+    else:
+        results.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+
+def _evaluate_chunk(chunk, results):
+    # Labeled archives are evaluated on the fly; only the counts travel back
+    y_true = _worker_predictor.preprocessor.encode_target(chunk['koi_disposition'])
+    labeled = y_true.notna().to_numpy()
+    if not labeled.any():
+        return None
+
+    y_pred = pd.Index(_worker_predictor.CLASS_NAMES).get_indexer(results['classification'])
+    y_proba = results[['prob_false_positive', 'prob_candidate', 'prob_confirmed']].to_numpy()
+
+    evaluator = StreamingEvaluator()
+    evaluator.update(y_true.to_numpy()[labeled].astype(int), y_pred[labeled], y_proba[labeled])
+    return evaluator
+
+def _evaluation_path(part_path):
+    return part_path.with_name(part_path.name.split('.')[0] + '.eval.npz')
+
+def _score_chunk(chunk, row_offset, part_path, output_format):
+    start = time.time()
+    results = _worker_predictor.predict_frame(chunk)
+    evaluator = _evaluate_chunk(chunk, results) if 'koi_disposition' in chunk.columns else None
+
+    # The counts are stored before the part file, so every finished part
+    # has its evaluation available to a resumed run
+    if evaluator is not None:
+        eval_path = _evaluation_path(part_path)
+        tmp_path = eval_path.with_name(eval_path.name.replace('.eval.npz', '.eval.tmp.npz'))
+        evaluator.save(tmp_path)
+        os.replace(tmp_path, eval_path)
+
+    results.insert(0, 'row', range(row_offset, row_offset + len(results)))
+    _write_part(results, part_path, output_format)
+    return len(results), time.time() - start, evaluator
+
+def resolve_inputs(inputs):
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            candidates = sorted(p for p in path.iterdir() if p.suffix in SUPPORTED_SUFFIXES)
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(item) if Path(p).suffix in SUPPORTED_SUFFIXES)
+        files.extend(candidates)
+
+    return list(dict.fromkeys(files))
+
+def output_name(filepath):
+    # Inputs from different directories (or CSV and Parquet copies) can share
+    # a stem, so the folder name also carries a hash of the resolved path
+    resolved = str(Path(filepath).resolve())
+    return f"{Path(filepath).stem}-{hashlib.sha1(resolved.encode('utf-8')).hexdigest()[:8]}"
+
+def input_stat(filepath):
+    # An input refreshed in place keeps its path, so finished parts are only
+    # reused while its size and modification time are unchanged
+    stat = Path(filepath).stat()
+    return {'path': str(Path(filepath).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def iter_chunks(filepath, chunksize):
+    if filepath.suffix == '.parquet':
+        if pq is None:
+            raise ImportError("pyarrow is required to read Parquet inputs")
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(filepath, chunksize=chunksize)
+
+class BatchScorer:
+    def __init__(self, bundle_path='models/inference_bundle.pkl', config_path='config/config.yaml',
+                 output_dir='data/processed/scores', chunksize=100000, workers=None,
+                 output_format=None, n_bootstrap=1000):
+        self.bundle_path = bundle_path
+        self.config_path = config_path
+        self.output_dir = Path(output_dir)
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self.n_bootstrap = n_bootstrap
+        self.evaluator = None
+
+        if output_format is None:
+            output_format = 'parquet' if pyarrow is not None else 'csv'
+        if output_format == 'parquet' and pyarrow is None:
+            raise ImportError("pyarrow is required for Parquet output; use --format csv")
+        self.output_format = output_format
+
+    def _check_manifest(self, version, files, overwrite):
+        manifest_path = self.output_dir / '_manifest.json'
+        settings = {
+            'model_version': version,
+            'chunksize': self.chunksize,
+            'format': self.output_format
+        }
+        inputs = {}
+
+        if manifest_path.exists() and not overwrite:
+            with open(manifest_path, 'r') as f:
+                previous = json.load(f)
+            inputs = previous.get('inputs', {})
+            previous_settings = {key: previous.get(key) for key in settings}
+            if previous_settings != settings:
+                raise ValueError(
+                    f"{self.output_dir} holds a run with different settings {previous_settings}; "
+                    "use --overwrite to start over"
+                )
+        elif overwrite and self.output_dir.exists():
+            shutil.rmtree(self.output_dir)
+
+        for filepath in files:
+            name = output_name(filepath)
+            current = input_stat(filepath)
+            if name in inputs and inputs[name] != current:
+                print(f"{filepath} changed since it was last scored; rescoring it")
+                shutil.rmtree(self.output_dir / name, ignore_errors=True)
+
+            # Inputs accumulate across resumed runs so every output folder can
+            # be traced back to its source file
+            inputs[name] = current
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, 'w') as f:
+            json.dump({**settings, 'inputs': inputs}, f, indent=2)
+
+    def run(self, files, overwrite=False):
+        bundle = ModelRegistry.read_bundle(self.bundle_path, sections=('header', 'serving'))
+        _require_fitted(bundle['preprocessor'], self.bundle_path)
+        version = bundle['version']
+        del bundle
+
+        self._check_manifest(version, files, overwrite)
+
+        print(f"Scoring {len(files)} files with model {version} on {self.workers} workers")
+
+        start = time.time()
+        self.evaluator = None
+        scored_rows = 0
+        skipped_chunks = 0
+        suffix = '.parquet' if self.output_format == 'parquet' else '.csv'
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.bundle_path, self.config_path)) as pool:
+            pending = set()
+
+            for filepath in files:
+                source_dir = self.output_dir / output_name(filepath)
+                source_dir.mkdir(parents=True, exist_ok=True)
+
+                for chunk_index, chunk in enumerate(iter_chunks(filepath, self.chunksize)):
+                    part_path = source_dir / f"part-{chunk_index:05d}{suffix}"
+
+                    # Parts are written atomically, so an existing part is a
+                    # finished chunk from an earlier, interrupted run.
+                    if part_path.exists():
+                        skipped_chunks += 1
+                        eval_path = _evaluation_path(part_path)
+                        if eval_path.exists():
+                            self._merge(StreamingEvaluator.load(eval_path))
+                        continue
+
+                    # Bound the number of parsed chunks held in memory
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        scored_rows += self._collect(done, start, scored_rows)
+
+                    pending.add(pool.submit(
+                        _score_chunk, chunk, chunk_index * self.chunksize, part_path, self.output_format
+                    ))
+
+            done, _ = wait(pending)
+            scored_rows += self._collect(done, start, scored_rows)
+
+        elapsed = time.time() - start
+        summary = {
+            'model_version': version,
+            'files': len(files),
+            'rows_scored': scored_rows,
+            'chunks_skipped': skipped_chunks,
+            'elapsed_seconds': elapsed,
+            'rows_per_second': scored_rows / elapsed if elapsed > 0 else 0.0,
+            'output_dir': str(self.output_dir)
+        }
+
+        if self.evaluator is not None:
+            evaluator = ModelEvaluator()
+            evaluator.evaluate_accumulated(self.evaluator, n_bootstrap=self.n_bootstrap)
+            summary['evaluated_rows'] = self.evaluator.n_samples
+            summary['evaluation'] = evaluator.metrics
+            evaluator.print_report()
+
+            with open(self.output_dir / '_evaluation.json', 'w') as f:
+                json.dump(summary['evaluation'], f, indent=2)
+
+        print(f"Scored {scored_rows} rows in {elapsed:.1f}s "
+              f"({summary['rows_per_second']:.0f} rows/s), skipped {skipped_chunks} finished chunks")
+        return summary
+
+    def _merge(self, evaluator):
+        self.evaluator = evaluator if self.evaluator is None else self.evaluator.merge(evaluator)
+
+    def _collect(self, futures, start, scored_so_far):
+        rows = 0
+        for future in futures:
+            chunk_rows, _, evaluator = future.result()
+            rows += chunk_rows
+            if evaluator is not None:
+                self._merge(evaluator)
+
+        total = scored_so_far + rows
+        elapsed = time.time() - start
+        print(f"  {total} rows scored, {total / elapsed if elapsed > 0 else 0:.0f} rows/s")
+        return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score directories of exoplanet catalogs offline')
+    parser.add_argument('inputs', nargs='+', help='CSV/Parquet files, directories or glob patterns')
+    parser.add_argument('--bundle', default='models/inference_bundle.pkl', help='Saved inference bundle')
+    parser.add_argument('--config', default='config/config.yaml', help='Configuration file')
+    parser.add_argument('--output', default='data/processed/scores', help='Output directory')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Rows per chunk')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=None, help='Output format')
+    parser.add_argument('--overwrite', action='store_true', help='Discard previous output instead of resuming')
+    parser.add_argument('--bootstrap', type=int, default=1000,
+                        help='Bootstrap replicates for metric confidence intervals on labeled inputs (0 to skip)')
+    args = parser.parse_args(argv)
+
+    files = resolve_inputs(args.inputs)
+    if not files:
+        print("No CSV or Parquet inputs found")
+        return 1
+
+    scorer = BatchScorer(
+        bundle_path=args.bundle,
+        config_path=args.config,
+        output_dir=args.output,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        output_format=args.format,
+        n_bootstrap=args.bootstrap
+    )
+    scorer.run(files, overwrite=args.overwrite)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
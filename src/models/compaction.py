@@ -0,0 +1,280 @@
+import pickle
+import time
+import warnings
+import numpy as np
+from sklearn.tree import DecisionTreeRegressor
+
+from src.evaluation.metrics import ModelEvaluator
+
+class CompactForest:
+    # Flat, reduced-precision storage for an averaged ensemble of trees.
+    # Thresholds are rounded down to float32 so that comparing float32 inputs
+    # gives the same branch as sklearn's float64 thresholds.
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features_in):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+        self.max_depth = 0
+
+    @staticmethod
+    def _node_depths(t):
+        left, right = t.children_left, t.children_right
+        depths = np.zeros(t.node_count, dtype=np.int32)
+        frontier = np.array([0])
+        depth = 0
+        while len(frontier):
+            children = np.concatenate([left[frontier], right[frontier]])
+            children = children[children != -1]
+            depth += 1
+            depths[children] = depth
+            frontier = children
+        return depths
+
+    @classmethod
+    def from_trees(cls, trees, classes, n_features_in, max_depth=None, value_dtype=np.float16):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        deepest = 0
+
+        for tree in trees:
+            t = tree.tree_
+            left, right = t.children_left, t.children_right
+            node_values = t.value[:, 0, :] if t.value.shape[1] == 1 else t.value[:, :, 0]
+            totals = node_values.sum(axis=1, keepdims=True)
+            node_values = node_values / np.where(totals == 0, 1, totals)
+
+            # Drop everything below max_depth; nodes at max_depth become
+            # leaves that predict their class distribution
+            depths = cls._node_depths(t)
+            keep = np.ones(t.node_count, dtype=bool) if max_depth is None else depths <= max_depth
+            leaf = left == -1
+            if max_depth is not None:
+                leaf |= depths >= max_depth
+
+            kept = np.flatnonzero(keep)
+            new_index = np.cumsum(keep) - 1 + offset
+            kept_leaf = leaf[kept]
+
+            threshold = t.threshold[kept].astype(np.float32)
+            rounded_up = threshold.astype(np.float64) > t.threshold[kept]
+            threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+
+            features.append(np.where(kept_leaf, 0, t.feature[kept]))
+            thresholds.append(np.where(kept_leaf, 0, threshold).astype(np.float32))
+            lefts.append(np.where(kept_leaf, -1, new_index[left[kept]]))
+            rights.append(np.where(kept_leaf, -1, new_index[right[kept]]))
+            values.append(node_values[kept])
+            roots.append(offset)
+
+            offset += len(kept)
+            deepest = max(deepest, int(depths[kept].max()))
+
+        feature_dtype = np.int16 if n_features_in < np.iinfo(np.int16).max else np.int32
+        compact = cls(
+            feature=np.concatenate(features).astype(feature_dtype),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(value_dtype),
+            roots=np.array(roots, dtype=np.int32),
+            classes=np.asarray(classes),
+            n_features_in=n_features_in
+        )
+        compact.max_depth = deepest
+        return compact
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def nbytes(self):
+        return len(pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def predict_proba(self, X, batch_size=10000):
+        X = np.asarray(X, dtype=np.float32)
+        probabilities = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+
+        for start in range(0, len(X), batch_size):
+            batch = X[start:start + batch_size]
+            rows = np.arange(len(batch))[None, :]
+
+            # Walk all trees for all rows at once, one level per iteration
+            nodes = np.repeat(self.roots[:, None], len(batch), axis=1)
+            for _ in range(self.max_depth):
+                go_left = batch[rows, self.feature[nodes]] <= self.threshold[nodes]
+                children = np.where(go_left, self.left[nodes], self.right[nodes])
+                nodes = np.where(children == -1, nodes, children)
+
+            probabilities[start:start + batch_size] = self.value[nodes].astype(np.float64).mean(axis=0)
+
+        return probabilities
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
+
+class ModelCompactor:
+    def __init__(self, max_bytes=None, max_latency_ms=None, max_accuracy_drop=0.01,
+                 depths=(None, 16, 12, 10, 8), value_dtype=np.float16,
+                 distill=False, student_depth=12, latency_rows=1000, selection_rows=20000,
+                 random_state=42):
+        self.max_bytes = max_bytes
+        self.max_latency_ms = max_latency_ms
+        self.max_accuracy_drop = max_accuracy_drop
+        self.depths = depths
+        self.value_dtype = value_dtype
+        self.distill = distill
+        self.student_depth = student_depth
+        self.latency_rows = latency_rows
+        self.selection_rows = selection_rows
+        self.random_state = random_state
+
+    def _tree_order(self, model, X_val, y_val):
+        # Greedy forward selection: repeatedly add the tree that most improves
+        # the accuracy of the averaged ensemble on the validation set.
+        if len(X_val) > self.selection_rows:
+            rows = np.random.default_rng(self.random_state).choice(len(X_val), self.selection_rows, replace=False)
+            X_val, y_val = X_val[rows], y_val[rows]
+
+        per_tree = np.stack([tree.predict_proba(X_val) for tree in model.estimators_])
+        y_index = np.searchsorted(model.classes_, y_val)
+
+        order = []
+        remaining = list(range(len(per_tree)))
+        running = np.zeros_like(per_tree[0])
+        while remaining:
+            scores = [
+                np.mean(np.argmax(running + per_tree[i], axis=1) == y_index) for i in remaining
+            ]
+            best = remaining.pop(int(np.argmax(scores)))
+            running += per_tree[best]
+            order.append(best)
+        return order
+
+    def _latency_ms(self, model, X_val):
+        X_bench = X_val[:self.latency_rows]
+        start = time.perf_counter()
+        model.predict_proba(X_bench)
+        return (time.perf_counter() - start) * 1000
+
+    def _meets_budget(self, size, latency):
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        if self.max_latency_ms is not None and latency > self.max_latency_ms:
+            return False
+        return True
+
+    def _evaluate(self, model, X_val, y_val):
+        evaluator = ModelEvaluator()
+        return evaluator.evaluate(y_val, model.predict(X_val), model.predict_proba(X_val))
+
+    def _student(self, model, X_train):
+        # Distill: fit a single regression tree to the forest's probabilities
+        student = DecisionTreeRegressor(max_depth=self.student_depth, random_state=self.random_state)
+        student.fit(X_train, model.predict_proba(X_train))
+        return CompactForest.from_trees([student], model.classes_, model.n_features_in_,
+                                        value_dtype=self.value_dtype)
+
+    def compact(self, model, X_val, y_val, X_train=None, X_eval=None, y_eval=None):
+        # X_val/y_val drive tree ordering and candidate choice; the reported
+        # deltas come from X_eval/y_eval when given, so they are not biased
+        # by the selection
+        if not hasattr(model, 'estimators_') or isinstance(model.estimators_, np.ndarray):
+            raise ValueError(f"Compaction requires a forest of classification trees, got {type(model).__name__}")
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='X does not have valid feature names')
+            return self._compact(model, X_val, y_val, X_train, X_eval, y_eval)
+
+    def _compact(self, model, X_val, y_val, X_train, X_eval, y_eval):
+        X_val = np.asarray(X_val, dtype=np.float32)
+        y_val = np.asarray(y_val)
+
+        if X_eval is None:
+            X_eval, y_eval = X_val, y_val
+        X_eval = np.asarray(X_eval, dtype=np.float32)
+        y_eval = np.asarray(y_eval)
+
+        baseline = self._evaluate(model, X_val, y_val)
+        baseline_size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        baseline_latency = self._latency_ms(model, X_val)
+
+        order = self._tree_order(model, X_val, y_val)
+        tree_counts = sorted({n for n in (1, 2, 5, 10, 20, 30, 50, 75, len(order)) if n <= len(order)})
+
+        candidates = []
+        for depth in self.depths:
+            for n_trees in tree_counts:
+                trees = [model.estimators_[i] for i in order[:n_trees]]
+                compact = CompactForest.from_trees(trees, model.classes_, model.n_features_in_,
+                                                   max_depth=depth, value_dtype=self.value_dtype)
+                candidates.append((f"prune(trees={n_trees}, depth={depth})", compact))
+
+        # The student is fitted on training rows so the validation comparison
+        # stays honest; without them distillation is skipped.
+        if self.distill and X_train is not None:
+            student = self._student(model, np.asarray(X_train, dtype=np.float32))
+            candidates.append((f"distill(depth={self.student_depth})", student))
+
+        evaluated = []
+        for name, compact in candidates:
+            size = compact.nbytes()
+            latency = self._latency_ms(compact, X_val)
+            if not self._meets_budget(size, latency):
+                continue
+            accuracy = compact.score(X_val, y_val)
+            evaluated.append((accuracy, -size, name, compact, latency))
+
+        if not evaluated:
+            raise ValueError("No compacted model meets the size/latency budget")
+
+        # Smallest model within the allowed accuracy drop; otherwise the most
+        # accurate model that fits the budget
+        acceptable = [e for e in evaluated if baseline['accuracy'] - e[0] <= self.max_accuracy_drop]
+        if acceptable:
+            chosen = max(acceptable, key=lambda e: (e[1], e[0]))
+        else:
+            chosen = max(evaluated, key=lambda e: (e[0], e[1]))
+
+        accuracy, neg_size, name, compact, latency = chosen
+        original = self._evaluate(model, X_eval, y_eval)
+        compacted = self._evaluate(compact, X_eval, y_eval)
+
+        report = {
+            'applied': True,
+            'strategy': name,
+            'n_estimators': compact.n_estimators,
+            'n_nodes': compact.n_nodes,
+            'max_depth': compact.max_depth,
+            'original_bytes': baseline_size,
+            'compacted_bytes': -neg_size,
+            'original_latency_ms': baseline_latency,
+            'compacted_latency_ms': latency,
+            'latency_rows': min(self.latency_rows, len(X_val)),
+            'selection_rows': int(len(X_val)),
+            'evaluation_rows': int(len(X_eval)),
+            'original_accuracy': original['accuracy'],
+            'compacted_accuracy': compacted['accuracy'],
+            'accuracy_delta': compacted['accuracy'] - original['accuracy'],
+            'f1_delta': compacted['f1_score'] - original['f1_score'],
+            'candidates_within_budget': len(evaluated),
+            # CompactForest keeps only the flattened trees
+            'unavailable': ['impurity feature importance', 'per-row explanations']
+        }
+
+        print(f"Compacted {type(model).__name__} to {name}: "
+              f"{baseline_size / 1e6:.1f}MB -> {report['compacted_bytes'] / 1e6:.2f}MB, "
+              f"accuracy delta {report['accuracy_delta']:+.4f}")
+
+        return compact, report
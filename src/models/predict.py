@@ -1,42 +1,99 @@
 import numpy as np
 import pandas as pd
 from pathlib import Path
+from src.evaluation.importance import path_attributions, supports_attribution
 
 class ExoplanetPredictor:
     def __init__(self, model, preprocessor):
         self.model = model
         self.preprocessor = preprocessor
 
-    def predict_batch(self, df):
+    CLASS_NAMES = np.array(['FALSE_POSITIVE', 'CANDIDATE', 'CONFIRMED'])
+    DISPLAY_COLUMNS = ['koi_period', 'koi_prad', 'koi_teq', 'koi_srad', 'ra', 'dec']
+
+    @staticmethod
+    def object_names(df):
+        if 'kepoi_name' in df.columns:
+            return df['kepoi_name'].astype(str).to_numpy()
+        if 'kepid' in df.columns:
+            return ('KOI-' + df['kepid'].astype(str)).to_numpy()
+        return np.array([f"Object-{i + 1}" for i in range(len(df))], dtype=object)
+
+    def _score(self, df):
         X, _ = self.preprocessor.preprocess(df, fit=False)
 
         predictions, probabilities = self.model.predict(X)
+        predictions = np.asarray(predictions).astype(int)
 
-        results = []
-        class_names = ['FALSE_POSITIVE', 'CANDIDATE', 'CONFIRMED']
+        results = pd.DataFrame({
+            'name': self.object_names(df),
+            'classification': self.CLASS_NAMES[predictions],
+            'confidence': probabilities[np.arange(len(predictions)), predictions],
+            'prob_false_positive': probabilities[:, 0],
+            'prob_candidate': probabilities[:, 1],
+            'prob_confirmed': probabilities[:, 2]
+        }, index=df.index)
+
+        for col in self.DISPLAY_COLUMNS:
+            if col in df.columns:
+                results[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+
+        return results, X, predictions
+
+    def predict_frame(self, df):
+        return self._score(df)[0]
+
+    def predict_batch(self, df, explain=False, top_features=3):
+        frame, X, predictions = self._score(df)
+        results = self.records_from_frame(frame)
+
+        if explain and supports_attribution(self.model.model):
+            contributions, bias = path_attributions(self.model.model, X)
+            feature_names = np.array(X.columns)
 
-        for idx, (pred, probs) in enumerate(zip(predictions, probabilities)):
+            for idx, (result, pred) in enumerate(zip(results, predictions)):
+                row_contributions = contributions[idx, :, pred]
+                top = np.argsort(-np.abs(row_contributions))[:top_features]
+                result['explanation'] = {
+                    'bias': float(bias[idx, pred]),
+                    'contributions': {
+                        str(feature_names[i]): float(row_contributions[i]) for i in top
+                    }
+                }
+
+        return results
+
+    @classmethod
+    def records_from_frame(cls, frame):
+        display_columns = [col for col in cls.DISPLAY_COLUMNS if col in frame.columns]
+        display_values = {
+            col: [None if v != v else v for v in frame[col].tolist()] for col in display_columns
+        }
+
+        names = frame['name'].tolist()
+        classifications = frame['classification'].tolist()
+        confidences = frame['confidence'].tolist()
+        prob_false_positive = frame['prob_false_positive'].tolist()
+        prob_candidate = frame['prob_candidate'].tolist()
+        prob_confirmed = frame['prob_confirmed'].tolist()
+
+        results = []
+        for idx in range(len(frame)):
             result = {
                 'index': idx,
-                'classification': class_names[pred],
-                'confidence': float(probs[pred]),
+                'classification': classifications[idx],
+                'confidence': confidences[idx],
                 'probabilities': {
-                    'false_positive': float(probs[0]),
-                    'candidate': float(probs[1]),
-                    'confirmed': float(probs[2])
+                    'false_positive': prob_false_positive[idx],
+                    'candidate': prob_candidate[idx],
+                    'confirmed': prob_confirmed[idx]
                 }
             }
 
-            for col in df.columns:
-                if col in ['koi_period', 'koi_prad', 'koi_teq', 'koi_srad', 'ra', 'dec']:
-                    result[col] = float(df.iloc[idx][col]) if pd.notna(df.iloc[idx][col]) else None
+            for col in display_columns:
+                result[col] = display_values[col][idx]
 
-            if 'kepoi_name' in df.columns:
-                result['name'] = str(df.iloc[idx]['kepoi_name'])
-            elif 'kepid' in df.columns:
-                result['name'] = f"KOI-{df.iloc[idx]['kepid']}"
-            else:
-                result['name'] = f"Object-{idx + 1}"
+            result['name'] = names[idx]
 
             results.append(result)
 
@@ -0,0 +1,160 @@
+import copy
+import os
+import pickle
+import threading
+import uuid
+import joblib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from src.data.preprocess import ExoplanetPreprocessor
+from src.models.predict import ExoplanetPredictor
+from src.models.train import ExoplanetClassifier
+
+@dataclass(frozen=True)
+class InferenceSnapshot:
+    version: str
+    classifier: object
+    preprocessor: object
+    similarity_index: object = None
+    dataset_fingerprint: str = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    def predictor(self):
+        preprocessor = self.preprocessor
+        if preprocessor.feature_names is None:
+            # Snapshots migrated from a legacy model have no fitted
+            # preprocessor. As the old server did, each predictor fits its
+            # own copy on the data it is given.
+            preprocessor = copy.deepcopy(preprocessor)
+        return ExoplanetPredictor(self.classifier, preprocessor)
+
+BUNDLE_MAGIC = b'EXOBNDL1'
+
+class ModelRegistry:
+    # Snapshots are never mutated after publishing. Requests pin the snapshot
+    # returned by current() for their whole lifetime, and retraining builds
+    # fresh objects and swaps the reference in publish().
+    def __init__(self, bundle_path='models/inference_bundle.pkl'):
+        self.bundle_path = Path(bundle_path)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        return self._snapshot
+
+    @staticmethod
+    def new_version():
+        return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def publish(self, classifier, preprocessor, similarity_index=None,
+                dataset_fingerprint=None, save=True):
+        snapshot = InferenceSnapshot(
+            version=self.new_version(),
+            classifier=classifier,
+            preprocessor=preprocessor,
+            similarity_index=similarity_index,
+            dataset_fingerprint=dataset_fingerprint
+        )
+
+        if save:
+            self.bundle_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.bundle_path.with_name(f"{self.bundle_path.name}.{snapshot.version}.tmp")
+            self.write_bundle(self._to_bundle(snapshot), tmp_path)
+
+        with self._lock:
+            self._snapshot = snapshot
+            if save:
+                os.replace(tmp_path, self.bundle_path)
+
+        print(f"Published inference snapshot {snapshot.version}")
+        return snapshot
+
+    @staticmethod
+    def _to_bundle(snapshot):
+        return {
+            'header': {
+                'version': snapshot.version,
+                'model_type': snapshot.classifier.model_type,
+                'dataset_fingerprint': snapshot.dataset_fingerprint,
+                'created_at': snapshot.created_at
+            },
+            'serving': {
+                'model': snapshot.classifier.model,
+                'preprocessor': snapshot.preprocessor
+            },
+            'extras': {
+                'validation_data': snapshot.classifier.validation_data,
+                'similarity_index': snapshot.similarity_index
+            }
+        }
+
+    @staticmethod
+    def write_bundle(sections, path):
+        # Sections are pickled one after another, so readers that only need
+        # the model can stop before the similarity index and validation split
+        with open(path, 'wb') as f:
+            f.write(BUNDLE_MAGIC)
+            for name in ('header', 'serving', 'extras'):
+                pickle.dump(sections[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def read_bundle(bundle_path='models/inference_bundle.pkl', sections=('header', 'serving', 'extras')):
+        bundle = {}
+        with open(bundle_path, 'rb') as f:
+            if f.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                # Bundles written before sections were introduced
+                return joblib.load(bundle_path)
+
+            for name in ('header', 'serving', 'extras'):
+                if name not in sections:
+                    break
+                bundle.update(pickle.load(f))
+
+        return bundle
+
+    @staticmethod
+    def load_snapshot(bundle_path='models/inference_bundle.pkl', config_path='config/config.yaml',
+                      include_extras=True):
+        sections = ('header', 'serving', 'extras') if include_extras else ('header', 'serving')
+        bundle = ModelRegistry.read_bundle(bundle_path, sections)
+
+        classifier = ExoplanetClassifier(config_path)
+        classifier.model = bundle['model']
+        classifier.model_type = bundle['model_type']
+        classifier.validation_data = bundle.get('validation_data')
+
+        return InferenceSnapshot(
+            version=bundle['version'],
+            classifier=classifier,
+            preprocessor=bundle['preprocessor'],
+            similarity_index=bundle.get('similarity_index'),
+            dataset_fingerprint=bundle.get('dataset_fingerprint'),
+            created_at=bundle['created_at']
+        )
+
+    def load_legacy(self, model_path='models/trained_model.pkl'):
+        # One-time migration of a model saved by ExoplanetClassifier.save_model
+        # before inference bundles existed
+        classifier = ExoplanetClassifier()
+        classifier.load_model(model_path)
+        classifier.model_type = {
+            'RandomForestClassifier': 'random_forest',
+            'GradientBoostingClassifier': 'gradient_boosting'
+        }.get(type(classifier.model).__name__, type(classifier.model).__name__)
+
+        snapshot = self.publish(classifier, ExoplanetPreprocessor())
+        print(f"Migrated legacy model {model_path} to {self.bundle_path}; "
+              "retrain to store a fitted preprocessor and similarity index")
+        return snapshot
+
+    def load(self, legacy_model_path='models/trained_model.pkl'):
+        if not self.bundle_path.exists() and legacy_model_path and Path(legacy_model_path).exists():
+            return self.load_legacy(legacy_model_path)
+
+        snapshot = self.load_snapshot(self.bundle_path)
+        with self._lock:
+            self._snapshot = snapshot
+        print(f"Inference snapshot {snapshot.version} loaded from {self.bundle_path}")
+        return snapshot
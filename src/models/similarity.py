@@ -0,0 +1,144 @@
+import time
+import numpy as np
+from sklearn.neighbors import KDTree, BallTree
+from sklearn.decomposition import PCA
+
+from src.models.predict import ExoplanetPredictor
+
+class SimilarityIndex:
+    TREES = {
+        'kd_tree': KDTree,
+        'ball_tree': BallTree
+    }
+
+    def __init__(self, mode='exact', algorithm='kd_tree', leaf_size=40,
+                 n_components=6, candidate_factor=4):
+        if mode not in ('exact', 'approximate'):
+            raise ValueError(f"Unknown similarity mode: {mode}")
+        if algorithm not in self.TREES:
+            raise ValueError(f"Unknown tree algorithm: {algorithm}")
+
+        self.mode = mode
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.n_components = n_components
+        self.candidate_factor = candidate_factor
+
+        self.feature_names = None
+        self.X = None
+        self.names = None
+        self.labels = None
+        self.projection = None
+        self.partitions = {}
+        self._name_lookup = {}
+
+    def build(self, X, df):
+        start = time.time()
+
+        self.feature_names = list(X.columns)
+        self.X = np.ascontiguousarray(X.to_numpy(dtype=np.float64))
+        self.names = ExoplanetPredictor.object_names(df)
+
+        if 'koi_disposition' in df.columns:
+            self.labels = np.array([self.normalize_label(v) for v in df['koi_disposition'].fillna('UNLABELED')],
+                                   dtype=object)
+        else:
+            self.labels = np.full(len(df), 'UNLABELED', dtype=object)
+
+        search_space = self.X
+        if self.mode == 'approximate' and self.X.shape[1] > self.n_components:
+            self.projection = PCA(n_components=self.n_components, random_state=42)
+            search_space = self.projection.fit_transform(self.X)
+        else:
+            self.projection = None
+
+        tree_class = self.TREES[self.algorithm]
+        self.partitions = {}
+        for label in np.unique(self.labels):
+            rows = np.flatnonzero(self.labels == label)
+            self.partitions[label] = (tree_class(search_space[rows], leaf_size=self.leaf_size), rows)
+
+        self._name_lookup = {name: idx for idx, name in enumerate(self.names)}
+
+        print(f"Built {self.mode} {self.algorithm} similarity index over {len(self.X)} objects "
+              f"in {time.time() - start:.2f}s")
+        return self
+
+    @staticmethod
+    def normalize_label(label):
+        # Accept the raw archive disposition ("FALSE POSITIVE") as well as
+        # the API's class names ("FALSE_POSITIVE")
+        return str(label).strip().upper().replace(' ', '_')
+
+    def row_for_name(self, name):
+        return self._name_lookup.get(name)
+
+    def _query_partition(self, tree, rows, Q, Q_search, k):
+        if self.projection is None:
+            k = min(k, len(rows))
+            distances, positions = tree.query(Q_search, k=k)
+            return distances, rows[positions]
+
+        n_candidates = min(k * self.candidate_factor, len(rows))
+        _, positions = tree.query(Q_search, k=n_candidates)
+        candidates = rows[positions]
+
+        # Re-rank the candidates with exact distances in the full feature space
+        distances = np.sqrt(((self.X[candidates] - Q[:, None, :]) ** 2).sum(axis=2))
+        order = np.argsort(distances, axis=1)[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(candidates, order, axis=1)
+
+    def query(self, Q, k=10, classification=None, exclude=None):
+        if self.X is None:
+            raise ValueError("Similarity index not built yet")
+
+        Q = np.atleast_2d(np.asarray(Q, dtype=np.float64))
+        Q_search = self.projection.transform(Q) if self.projection is not None else Q
+
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        if classification is not None:
+            label = self.normalize_label(classification)
+            if label not in self.partitions:
+                raise ValueError(f"Unknown classification: {classification}. "
+                                 f"Available: {', '.join(sorted(self.partitions))}")
+            labels = [label]
+        else:
+            labels = list(self.partitions)
+
+        k_search = k + (1 if exclude is not None else 0)
+
+        all_distances, all_rows = [], []
+        for label in labels:
+            tree, rows = self.partitions[label]
+            distances, neighbour_rows = self._query_partition(tree, rows, Q, Q_search, k_search)
+            all_distances.append(distances)
+            all_rows.append(neighbour_rows)
+
+        if not all_distances:
+            return [[] for _ in range(len(Q))]
+
+        distances = np.hstack(all_distances)
+        rows = np.hstack(all_rows)
+        order = np.argsort(distances, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+
+        results = []
+        for query_distances, query_rows in zip(distances, rows):
+            neighbours = []
+            for distance, row in zip(query_distances, query_rows):
+                if exclude is not None and row == exclude:
+                    continue
+                neighbours.append({
+                    'index': int(row),
+                    'name': str(self.names[row]),
+                    'classification': str(self.labels[row]),
+                    'distance': float(distance)
+                })
+                if len(neighbours) == k:
+                    break
+            results.append(neighbours)
+
+        return results
@@ -7,13 +7,18 @@ import joblib
 import yaml
 from pathlib import Path
 
+from src.models.compaction import ModelCompactor
+
 class ExoplanetClassifier:
-    def __init__(self, config_path='config/config.yaml'):
+    def __init__(self, config_path='config/config.yaml', n_jobs=None):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
 
+        self.n_jobs = n_jobs if n_jobs is not None else self.config['model'].get('n_jobs', -1)
+
         self.model = None
         self.model_type = 'random_forest'
+        self.validation_data = None
 
     def create_model(self, model_type='random_forest'):
         self.model_type = model_type
@@ -23,7 +28,7 @@ class ExoplanetClassifier:
                 n_estimators=self.config['model']['n_estimators'],
                 random_state=self.config['model']['random_state'],
                 class_weight='balanced',
-                n_jobs=-1
+                n_jobs=self.n_jobs
             )
         elif model_type == 'gradient_boosting':
             self.model = GradientBoostingClassifier(
@@ -48,7 +53,22 @@ class ExoplanetClassifier:
             stratify=y
         )
 
-        self.model.fit(X_train, y_train)
+        compaction_report = None
+        if self.config.get('compaction', {}).get('enabled') and self.model_type == 'random_forest':
+            # Compaction picks trees and the candidate on its own split of the
+            # training data, so the test split stays untouched for reporting
+            X_train, X_select, y_train, y_select = train_test_split(
+                X_train, y_train,
+                test_size=self.config['compaction'].get('selection_size', 0.2),
+                random_state=self.config['model']['random_state'],
+                stratify=y_train
+            )
+            self.model.fit(X_train, y_train)
+            self.validation_data = (X_test, y_test)
+            compaction_report = self.compact(X_train, selection_data=(X_select, y_select))
+        else:
+            self.model.fit(X_train, y_train)
+            self.validation_data = (X_test, y_test)
 
         train_score = self.model.score(X_train, y_train)
         test_score = self.model.score(X_test, y_test)
@@ -63,9 +83,41 @@ class ExoplanetClassifier:
         return {
             'train_score': train_score,
             'test_score': test_score,
-            'model_type': self.model_type
+            'model_type': self.model_type,
+            'compaction': compaction_report
         }
 
+    def compact(self, X_train=None, selection_data=None, **budget):
+        if self.validation_data is None:
+            raise ValueError("Model has no validation data to compare against")
+
+        settings = {k: v for k, v in self.config.get('compaction', {}).items()
+                    if k not in ('enabled', 'selection_size')}
+        settings.update(budget)
+
+        X_test, y_test = self.validation_data
+        if selection_data is None:
+            # Called after training: select on one half of the validation
+            # split and report on the other
+            X_select, X_test, y_select, y_test = train_test_split(
+                X_test, y_test, test_size=0.5,
+                random_state=self.config['model']['random_state'], stratify=y_test
+            )
+        else:
+            X_select, y_select = selection_data
+
+        try:
+            compacted, report = ModelCompactor(**settings).compact(
+                self.model, X_select, y_select, X_train, X_eval=X_test, y_eval=y_test
+            )
+        except ValueError as e:
+            print(f"Compaction skipped, keeping the full model: {e}")
+            return {'applied': False, 'error': str(e)}
+
+        self.model = compacted
+        self.model_type = f"{self.model_type}_compact"
+        return report
+
     def predict(self, X):
         if self.model is None:
             raise ValueError("Model not trained yet")
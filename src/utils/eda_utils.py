@@ -68,6 +68,17 @@ class EDAUtils:
         plt.xticks(rotation=45, ha='right')
         return EDAUtils.plot_to_base64(fig)
 
+    @staticmethod
+    def generate_sampled_report(filepath, sampler):
+        sample, sampling_report, full_stats = sampler.sample(filepath)
+
+        report = EDAUtils.generate_full_report(sample)
+        report['summary']['shape']['rows'] = sampling_report['total_rows']
+        report['summary']['missing_values'] = full_stats['missing'].to_dict()
+        report['sampling'] = sampling_report
+
+        return report
+
     @staticmethod
     def generate_full_report(df):
         report = {
@@ -7,6 +7,15 @@ class Galaxy3DGenerator:
         self.max_planets = self.config.get('max_planets_display', 100)
         self.galaxy_radius = self.config.get('galaxy_radius', 1000)
 
+    @staticmethod
+    def _value(prediction, key, default):
+        # Catalogs often lack values such as koi_teq; missing, None and NaN
+        # all fall back to the display default
+        value = prediction.get(key)
+        if value is None or value != value:
+            return default
+        return float(value)
+
     def generate_planet_system(self, prediction, index):
         angle = (index / self.max_planets) * 2 * np.pi
         radius = 50 + index * 15
@@ -22,20 +31,20 @@ class Galaxy3DGenerator:
                 'z': float(np.sin(angle) * radius)
             },
             'star': {
-                'radius': float(prediction.get('koi_srad', 1.0)) * 3,
-                'temperature': float(prediction.get('koi_teq', 5000)),
-                'color': self.get_star_color(prediction.get('koi_teq', 5000))
+                'radius': self._value(prediction, 'koi_srad', 1.0) * 3,
+                'temperature': self._value(prediction, 'koi_teq', 5000),
+                'color': self.get_star_color(self._value(prediction, 'koi_teq', 5000))
             },
             'planet': {
-                'radius': max(float(prediction.get('koi_prad', 1.0)) * 0.5, 0.5),
-                'orbitalPeriod': float(prediction.get('koi_period', 10)),
-                'orbitalRadius': float(prediction.get('koi_period', 10)) / 10,
-                'temperature': float(prediction.get('koi_teq', 300)),
+                'radius': max(self._value(prediction, 'koi_prad', 1.0) * 0.5, 0.5),
+                'orbitalPeriod': self._value(prediction, 'koi_period', 10),
+                'orbitalRadius': self._value(prediction, 'koi_period', 10) / 10,
+                'temperature': self._value(prediction, 'koi_teq', 300),
                 'color': self.get_planet_color(prediction['classification'])
             },
             'coordinates': {
-                'ra': float(prediction.get('ra', 0)) if prediction.get('ra') else None,
-                'dec': float(prediction.get('dec', 0)) if prediction.get('dec') else None
+                'ra': self._value(prediction, 'ra', None),
+                'dec': self._value(prediction, 'dec', None)
             }
         }
 
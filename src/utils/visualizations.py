@@ -1,53 +1,177 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import pandas as pd
+from pathlib import Path
+from joblib import Parallel, delayed
+from matplotlib.colors import to_rgb
+from matplotlib.patches import Patch
 
-class ExoplanetVisualizer:
-    def __init__(self):
-        sns.set_style('darkgrid')
-        plt.rcParams['figure.figsize'] = (12, 8)
+from src.utils.eda_utils import EDAUtils
 
-    def plot_orbital_periods(self, data, save_path=None):
-        fig, ax = plt.subplots()
-        ax.hist(data['koi_period'].dropna(), bins=50, edgecolor='black')
-        ax.set_xlabel('Orbital Period (days)')
-        ax.set_ylabel('Frequency')
-        ax.set_title('Distribution of Exoplanet Orbital Periods')
+CLASS_COLORS = {
+    'CONFIRMED': '#4488ff',
+    'CANDIDATE': '#ffaa44',
+    'FALSE_POSITIVE': '#888888'
+}
+
+def _apply_style():
+    sns.set_style('darkgrid')
+    plt.rcParams['figure.figsize'] = (12, 8)
+
+def _finish(fig, save_path):
+    if save_path:
+        fig.savefig(save_path)
+        plt.close(fig)
+        return str(save_path)
+    return EDAUtils.plot_to_base64(fig)
+
+def _draw_histogram(edges, counts, xlabel, title, log_x=False, save_path=None):
+    _apply_style()
+    fig, ax = plt.subplots()
+    ax.stairs(counts, edges, fill=True, edgecolor='black')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Frequency')
+    ax.set_title(title)
+    if log_x:
         ax.set_xscale('log')
+    return _finish(fig, save_path)
 
-        if save_path:
-            plt.savefig(save_path)
-        else:
-            plt.show()
+def _draw_bars(labels, counts, save_path=None):
+    _apply_style()
+    fig, ax = plt.subplots()
+    ax.bar(labels, counts, color=[CLASS_COLORS.get(label, '#888888') for label in labels])
+    ax.set_xlabel('Classification')
+    ax.set_ylabel('Count')
+    ax.set_title('Exoplanet Classification Distribution')
+    return _finish(fig, save_path)
 
-        plt.close()
+def _draw_density(image, extent, labels, total, save_path=None):
+    _apply_style()
+    fig, ax = plt.subplots()
+    ax.imshow(image, origin='lower', extent=extent, aspect='auto', interpolation='nearest')
+    ax.set_xlabel('log10 Orbital Period (days)')
+    ax.set_ylabel('log10 Planet Radius (Earth radii)')
+    ax.set_title(f'Period-Radius Density ({total:,} objects)')
+    ax.grid(False)
+    ax.legend(handles=[Patch(color=CLASS_COLORS.get(label, '#ffffff'), label=label) for label in labels],
+              loc='upper right')
+    return _finish(fig, save_path)
 
-    def plot_planet_radii(self, data, save_path=None):
-        fig, ax = plt.subplots()
-        ax.hist(data['koi_prad'].dropna(), bins=50, edgecolor='black')
-        ax.set_xlabel('Planet Radius (Earth radii)')
-        ax.set_ylabel('Frequency')
-        ax.set_title('Distribution of Exoplanet Radii')
+class ExoplanetVisualizer:
+    # Every plot reduces the catalog to fixed-size NumPy aggregates first, so
+    # drawing cost depends on the number of bins, not on the number of rows.
+    def __init__(self, bins=50, resolution=(400, 300)):
+        _apply_style()
+        self.bins = bins
+        self.resolution = resolution
+
+    @staticmethod
+    def _frame(data):
+        if isinstance(data, pd.DataFrame):
+            return data
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def _classes(df):
+        if 'classification' in df.columns:
+            return df['classification'].astype(str).to_numpy()
+        if 'koi_disposition' in df.columns:
+            return df['koi_disposition'].fillna('UNLABELED').astype(str).str.replace(' ', '_').to_numpy()
+        return np.full(len(df), 'ALL', dtype=object)
+
+    @staticmethod
+    def _positive(values):
+        values = np.asarray(values, dtype=np.float64)
+        return values[np.isfinite(values) & (values > 0)]
+
+    def period_histogram(self, data):
+        periods = self._positive(self._frame(data)['koi_period'])
+        if len(periods) == 0:
+            return np.array([1.0, 10.0]), np.zeros(1)
+        edges = np.logspace(np.log10(periods.min()), np.log10(periods.max()) + 1e-9, self.bins + 1)
+        counts, edges = np.histogram(periods, bins=edges)
+        return edges, counts
+
+    def radius_histogram(self, data):
+        radii = self._frame(data)['koi_prad'].to_numpy(dtype=np.float64)
+        counts, edges = np.histogram(radii[np.isfinite(radii)], bins=self.bins)
+        return edges, counts
 
-        if save_path:
-            plt.savefig(save_path)
-        else:
-            plt.show()
+    def class_counts(self, data):
+        labels, counts = np.unique(self._classes(self._frame(data)), return_counts=True)
+        return list(labels), counts
 
-        plt.close()
+    def period_radius_density(self, data):
+        df = self._frame(data)
+        log_period = np.log10(df['koi_period'].to_numpy(dtype=np.float64))
+        log_radius = np.log10(df['koi_prad'].to_numpy(dtype=np.float64))
+        classes = self._classes(df)
+
+        valid = np.isfinite(log_period) & np.isfinite(log_radius)
+        log_period, log_radius, classes = log_period[valid], log_radius[valid], classes[valid]
+
+        width, height = self.resolution
+        if len(log_period) == 0:
+            return np.zeros((height, width, 3)), [0, 1, 0, 1], [], 0
+
+        extent = [log_period.min(), log_period.max() + 1e-9, log_radius.min(), log_radius.max() + 1e-9]
+        ranges = [extent[:2], extent[2:]]
+
+        labels = list(np.unique(classes))
+        grids = np.stack([
+            np.histogram2d(log_radius[classes == label], log_period[classes == label],
+                           bins=(height, width), range=ranges[::-1])[0]
+            for label in labels
+        ])
+
+        # Hue from the class mix in each pixel, brightness from log density
+        total = grids.sum(axis=0)
+        colors = np.array([to_rgb(CLASS_COLORS.get(label, '#ffffff')) for label in labels])
+        mix = np.einsum('chw,cr->hwr', grids, colors) / np.maximum(total, 1)[..., None]
+        brightness = np.log1p(total) / max(np.log1p(total.max()), 1e-12)
+        image = mix * brightness[..., None]
+
+        return image, extent, labels, int(valid.sum())
+
+    def plot_orbital_periods(self, data, save_path=None):
+        edges, counts = self.period_histogram(data)
+        return _draw_histogram(edges, counts, 'Orbital Period (days)',
+                               'Distribution of Exoplanet Orbital Periods', log_x=True, save_path=save_path)
+
+    def plot_planet_radii(self, data, save_path=None):
+        edges, counts = self.radius_histogram(data)
+        return _draw_histogram(edges, counts, 'Planet Radius (Earth radii)',
+                               'Distribution of Exoplanet Radii', save_path=save_path)
 
     def plot_classification_distribution(self, predictions, save_path=None):
-        classifications = [p['classification'] for p in predictions]
+        labels, counts = self.class_counts(predictions)
+        return _draw_bars(labels, counts, save_path=save_path)
+
+    def plot_period_radius_density(self, data, save_path=None):
+        image, extent, labels, total = self.period_radius_density(data)
+        return _draw_density(image, extent, labels, total, save_path=save_path)
+
+    def render_all(self, data, output_dir, n_jobs=-1):
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
 
-        fig, ax = plt.subplots()
-        ax.bar(range(len(classifications)), classifications)
-        ax.set_xlabel('Classification')
-        ax.set_ylabel('Count')
-        ax.set_title('Exoplanet Classification Distribution')
+        # Aggregate once here; workers only receive the small binned arrays.
+        period_edges, period_counts = self.period_histogram(data)
+        radius_edges, radius_counts = self.radius_histogram(data)
+        labels, counts = self.class_counts(data)
+        image, extent, density_labels, total = self.period_radius_density(data)
 
-        if save_path:
-            plt.savefig(save_path)
-        else:
-            plt.show()
+        jobs = [
+            delayed(_draw_histogram)(period_edges, period_counts, 'Orbital Period (days)',
+                                     'Distribution of Exoplanet Orbital Periods', True,
+                                     output_dir / 'orbital_periods.png'),
+            delayed(_draw_histogram)(radius_edges, radius_counts, 'Planet Radius (Earth radii)',
+                                     'Distribution of Exoplanet Radii', False,
+                                     output_dir / 'planet_radii.png'),
+            delayed(_draw_bars)(labels, counts, output_dir / 'classification_distribution.png'),
+            delayed(_draw_density)(image, extent, density_labels, total,
+                                   output_dir / 'period_radius_density.png')
+        ]
 
-        plt.close()
+        return Parallel(n_jobs=n_jobs)(jobs)
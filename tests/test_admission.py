@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionController, AdmissionRejected
+
+def wait_for_queue(controller, length, timeout=5):
+    deadline = time.time() + timeout
+    while controller.status()['queued'] != length:
+        assert time.time() < deadline, f"queue never reached {length}"
+        time.sleep(0.01)
+
+def test_waiting_requests_are_admitted_in_order():
+    controller = AdmissionController(100, cpu_budget=4, queue_timeout=5)
+    held = controller.acquire('process', 50)
+    admitted = []
+
+    def request(name, memory):
+        ticket = controller.acquire('eda', memory, threads=1)
+        admitted.append(name)
+        return ticket
+
+    large = threading.Thread(target=request, args=('large', 80))
+    large.start()
+    wait_for_queue(controller, 1)
+
+    # The small request would fit now, but may not overtake the large one
+    small = threading.Thread(target=request, args=('small', 10))
+    small.start()
+    wait_for_queue(controller, 2)
+    time.sleep(0.1)
+    assert admitted == []
+
+    controller.release(held)
+    large.join(5)
+    small.join(5)
+    assert admitted == ['large', 'small']
+    assert controller.status()['memory_in_use'] == 90
+
+def test_timeout_rejects_with_retry_after():
+    controller = AdmissionController(100, cpu_budget=4, queue_timeout=0.1, retry_after=7)
+    controller.acquire('process', 100)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('eda', 10)
+    assert excinfo.value.status == 503
+    assert excinfo.value.retry_after == 7
+    assert controller.status()['queued'] == 0
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(100, cpu_budget=4, queue_timeout=5, max_queue=0)
+
+    start = time.time()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('eda', 10)
+    assert excinfo.value.status == 503
+    assert time.time() - start < 1
+
+def test_request_larger_than_budget_is_413():
+    controller = AdmissionController(100, cpu_budget=4)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('process', 101)
+    assert excinfo.value.status == 413
+    assert excinfo.value.retry_after is None
+    assert controller.status()['memory_in_use'] == 0
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from src.data.preprocess import ExoplanetPreprocessor
+from src.models.batch_score import BatchScorer, output_name
+from src.models.registry import ModelRegistry
+
+def write_catalog(path, rows):
+    pd.DataFrame({'koi_period': [float(i) for i in range(rows)]}).to_csv(path, index=False)
+
+def test_changed_input_is_rescored(tmp_path):
+    catalog = tmp_path / 'koi.csv'
+    write_catalog(catalog, 10)
+    scorer = BatchScorer(output_dir=tmp_path / 'scores', output_format='csv')
+
+    scorer._check_manifest('v1', [catalog], overwrite=False)
+    part = tmp_path / 'scores' / output_name(catalog) / 'part-00000.csv'
+    part.parent.mkdir()
+    part.touch()
+
+    # Resuming with the same input keeps its finished parts
+    scorer._check_manifest('v1', [catalog], overwrite=False)
+    assert part.exists()
+
+    write_catalog(catalog, 20)
+    scorer._check_manifest('v1', [catalog], overwrite=False)
+    assert not part.exists()
+
+def test_legacy_bundle_is_refused(tmp_path):
+    bundle_path = tmp_path / 'bundle.pkl'
+    ModelRegistry.write_bundle({
+        'header': {'version': 'v1', 'model_type': 'random_forest',
+                   'dataset_fingerprint': None, 'created_at': 'now'},
+        'serving': {'model': None, 'preprocessor': ExoplanetPreprocessor()},
+        'extras': {}
+    }, bundle_path)
+
+    catalog = tmp_path / 'koi.csv'
+    write_catalog(catalog, 10)
+    scorer = BatchScorer(bundle_path=bundle_path, output_dir=tmp_path / 'scores', output_format='csv')
+
+    with pytest.raises(ValueError, match='retrain first'):
+        scorer.run([catalog])
+    assert not (tmp_path / 'scores').exists()
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+from src.data.chunked_upload import ChunkedUploadManager, ChunkedUploadError
+
+PAYLOAD = bytes(range(256)) * 4 + b'tail'
+
+def make_manager(tmp_path, **kwargs):
+    return ChunkedUploadManager(tmp_path, chunk_size=100, min_chunk_size=1, **kwargs)
+
+def start(manager, payload=PAYLOAD, filename='koi.csv'):
+    manifest = manager.initiate(filename, len(payload), hashlib.sha256(payload).hexdigest())
+    return manifest['upload_id'], manifest['chunk_size'], manifest['total_chunks']
+
+def send(manager, upload_id, chunk_size, index, payload=PAYLOAD):
+    data = payload[index * chunk_size:(index + 1) * chunk_size]
+    return manager.write_chunk(upload_id, index, io.BytesIO(data))
+
+def test_out_of_order_chunks_and_resume(tmp_path):
+    manager = make_manager(tmp_path)
+    upload_id, chunk_size, total = start(manager)
+
+    sent = list(range(total))[::2][::-1]
+    for index in sent:
+        send(manager, upload_id, chunk_size, index)
+
+    # A dropped client resumes from status() and sends only what is missing
+    status = manager.status(upload_id)
+    assert status['received_chunks'] == sorted(sent)
+    assert not status['complete']
+    with pytest.raises(ChunkedUploadError, match='incomplete'):
+        manager.finalize(upload_id)
+
+    for index in status['missing_chunks']:
+        send(manager, upload_id, chunk_size, index)
+
+    filepath, digest = manager.finalize(upload_id)
+    assert filepath.read_bytes() == PAYLOAD
+    assert digest == hashlib.sha256(PAYLOAD).hexdigest()
+    assert not (tmp_path / '.chunked' / upload_id).exists()
+
+def test_oversize_and_short_chunks_are_not_recorded(tmp_path):
+    manager = make_manager(tmp_path)
+    upload_id, chunk_size, total = start(manager)
+
+    with pytest.raises(ChunkedUploadError, match='larger'):
+        manager.write_chunk(upload_id, 0, io.BytesIO(b'x' * (chunk_size + 1)))
+    with pytest.raises(ChunkedUploadError, match='incomplete'):
+        manager.write_chunk(upload_id, 1, io.BytesIO(b'x' * (chunk_size - 1)))
+    with pytest.raises(ChunkedUploadError, match='out of range'):
+        manager.write_chunk(upload_id, total, io.BytesIO(b'x'))
+
+    assert manager.status(upload_id)['received_chunks'] == []
+
+def test_checksum_mismatch_keeps_session(tmp_path):
+    manager = make_manager(tmp_path)
+    upload_id, chunk_size, total = start(manager)
+
+    corrupt = b'\xff' + PAYLOAD[1:]
+    for index in range(total):
+        send(manager, upload_id, chunk_size, index, payload=corrupt)
+
+    with pytest.raises(ChunkedUploadError, match='Checksum mismatch'):
+        manager.finalize(upload_id)
+
+    # Re-sending the bad chunk repairs the upload
+    send(manager, upload_id, chunk_size, 0)
+    filepath, _ = manager.finalize(upload_id)
+    assert filepath.read_bytes() == PAYLOAD
+
+def test_finalize_never_overwrites(tmp_path):
+    manager = make_manager(tmp_path)
+    paths = []
+    for payload in (PAYLOAD, PAYLOAD[::-1]):
+        upload_id, chunk_size, total = start(manager, payload)
+        for index in range(total):
+            send(manager, upload_id, chunk_size, index, payload=payload)
+        paths.append(manager.finalize(upload_id)[0])
+
+    assert paths[0] != paths[1]
+    assert paths[0].read_bytes() == PAYLOAD
+    assert paths[1].read_bytes() == PAYLOAD[::-1]
+
+def test_no_chunks_accepted_while_closing(tmp_path):
+    manager = make_manager(tmp_path)
+    upload_id, chunk_size, _ = start(manager)
+
+    manager._close(upload_id)
+    with pytest.raises(ChunkedUploadError, match='being finalized'):
+        send(manager, upload_id, chunk_size, 0)
+    manager._reopen(upload_id)
+
+    manager._start_write(upload_id)
+    with pytest.raises(ChunkedUploadError, match='being written'):
+        manager.finalize(upload_id)
+    manager._end_write(upload_id)
+
+def test_idle_sessions_expire(tmp_path):
+    manager = make_manager(tmp_path, session_ttl=60)
+    stale_id, _, _ = start(manager)
+    fresh_id, _, _ = start(manager)
+
+    old = time.time() - 120
+    os.utime(tmp_path / '.chunked' / stale_id / 'data.part', (old, old))
+
+    assert manager.expire_sessions() == [stale_id]
+    with pytest.raises(ChunkedUploadError, match='Unknown'):
+        manager.status(stale_id)
+    assert manager.status(fresh_id)['total_chunks'] > 0
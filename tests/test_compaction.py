@@ -0,0 +1,43 @@
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+
+from src.models.compaction import CompactForest
+
+def make_forest():
+    X, y = make_classification(n_samples=800, n_features=8, n_informative=5, n_classes=3,
+                               random_state=1)
+    model = RandomForestClassifier(n_estimators=15, random_state=1).fit(X, y)
+    return model, X.astype(np.float32)
+
+def test_full_forest_takes_the_same_branches_as_sklearn():
+    model, X = make_forest()
+
+    # float64 leaf values isolate branching: any different leaf would show up
+    compact = CompactForest.from_trees(model.estimators_, model.classes_, model.n_features_in_,
+                                       value_dtype=np.float64)
+
+    np.testing.assert_allclose(compact.predict_proba(X), model.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(compact.predict(X), model.predict(X))
+
+def test_threshold_ties_follow_sklearn():
+    model, X = make_forest()
+    compact = CompactForest.from_trees(model.estimators_, model.classes_, model.n_features_in_,
+                                       value_dtype=np.float64)
+
+    # Inputs sitting exactly on float32-rounded split thresholds
+    tree = model.estimators_[0].tree_
+    internal = np.flatnonzero(tree.children_left != -1)
+    X_ties = np.repeat(X[:1], len(internal), axis=0)
+    X_ties[np.arange(len(internal)), tree.feature[internal]] = tree.threshold[internal].astype(np.float32)
+
+    np.testing.assert_allclose(compact.predict_proba(X_ties), model.predict_proba(X_ties), atol=1e-12)
+
+def test_depth_pruning_keeps_probabilities_valid():
+    model, X = make_forest()
+    compact = CompactForest.from_trees(model.estimators_[:5], model.classes_, model.n_features_in_,
+                                       max_depth=4)
+
+    probabilities = compact.predict_proba(X)
+    assert compact.max_depth <= 4
+    np.testing.assert_allclose(probabilities.sum(axis=1), 1.0, atol=1e-2)
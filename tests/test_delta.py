@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from src.data.delta import CatalogDeltaTracker
+
+class CountingPredictor:
+    def __init__(self):
+        self.scored = 0
+
+    def predict_frame(self, df):
+        self.scored += len(df)
+        return pd.DataFrame({
+            'name': df['kepoi_name'].to_numpy(),
+            'confidence': df['koi_period'].to_numpy(dtype=np.float64)
+        }, index=df.index)
+
+def make_catalog():
+    return pd.DataFrame({
+        'kepoi_name': [f"K{i:05d}.01" for i in range(10)],
+        'kepid': np.arange(10, dtype=np.int64),
+        'koi_period': np.arange(10, dtype=np.float64) + 1.0
+    })
+
+def test_insert_change_delete(tmp_path):
+    tracker = CatalogDeltaTracker(tmp_path)
+    predictor = CountingPredictor()
+
+    results, dirty, summary = tracker.update('koi', make_catalog(), predictor, 'v1')
+    assert summary['full_refresh'] and summary['inserted'] == 10
+
+    df = make_catalog()
+    df.loc[3, 'koi_period'] = 99.0
+    df = df.drop(index=7)
+    df = pd.concat([df, pd.DataFrame({'kepoi_name': ['K99999.01'], 'kepid': [99], 'koi_period': [5.0]})],
+                   ignore_index=True)
+
+    predictor.scored = 0
+    results, dirty, summary = tracker.update('koi', df, predictor, 'v1')
+
+    assert not summary['full_refresh']
+    assert (summary['inserted'], summary['changed'], summary['deleted'], summary['unchanged']) == (1, 1, 1, 8)
+    assert predictor.scored == 2
+    assert list(results.index) == list(df['kepoi_name'])
+    assert results.loc['K00003.01', 'confidence'] == 99.0
+    assert 'K00007.01' not in results.index
+
+def test_int_column_becoming_float_only_marks_the_edited_row(tmp_path):
+    tracker = CatalogDeltaTracker(tmp_path)
+    predictor = CountingPredictor()
+    tracker.update('koi', make_catalog(), predictor, 'v1')
+
+    # One missing kepid turns the column into float64
+    df = make_catalog()
+    df['kepid'] = df['kepid'].astype('float64')
+    df.loc[4, 'kepid'] = np.nan
+
+    predictor.scored = 0
+    _, dirty, summary = tracker.update('koi', df, predictor, 'v1')
+
+    assert summary['changed'] == 1 and summary['unchanged'] == 9
+    assert dirty.sum() == 1 and predictor.scored == 1
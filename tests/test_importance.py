@@ -0,0 +1,39 @@
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+from src.evaluation.importance import path_attributions
+
+def make_data():
+    X, y = make_classification(n_samples=600, n_features=6, n_informative=4, n_classes=3,
+                               random_state=0)
+    return X.astype(np.float32), y
+
+def test_forest_attributions_sum_to_predict_proba():
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+
+    contributions, bias = path_attributions(model, X)
+
+    assert contributions.shape == (len(X), X.shape[1], 3)
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), model.predict_proba(X), atol=1e-10)
+
+def test_boosting_attributions_sum_to_decision_function():
+    X, y = make_data()
+    model = GradientBoostingClassifier(n_estimators=15, max_depth=3, random_state=0).fit(X, y)
+
+    contributions, bias = path_attributions(model, X)
+
+    # The bias is the model's initial prediction, the same for every row
+    np.testing.assert_allclose(bias, np.broadcast_to(bias[0], bias.shape), atol=1e-10)
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), model.decision_function(X), atol=1e-10)
+
+def test_blocks_match_single_pass():
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, y)
+
+    whole, whole_bias = path_attributions(model, X, block_size=len(X))
+    blocked, blocked_bias = path_attributions(model, X, block_size=128)
+
+    np.testing.assert_allclose(blocked, whole)
+    np.testing.assert_allclose(blocked_bias, whole_bias)
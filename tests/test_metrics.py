@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score, precision_score, recall_score, f1_score, confusion_matrix, roc_auc_score
+)
+
+from src.evaluation.metrics import ModelEvaluator, StreamingEvaluator
+
+def make_predictions(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    y_true = rng.choice(3, size=n, p=[0.5, 0.3, 0.2])
+    logits = rng.normal(size=(n, 3))
+    logits[np.arange(n), y_true] += 1.5
+    y_proba = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    return y_true, y_proba.argmax(axis=1), y_proba
+
+def test_streaming_matches_sklearn():
+    y_true, y_pred, y_proba = make_predictions()
+
+    chunks = [(y_true[i:i + 700], y_pred[i:i + 700], y_proba[i:i + 700]) for i in range(0, len(y_true), 700)]
+    metrics = ModelEvaluator().evaluate_stream(chunks)
+
+    np.testing.assert_allclose(metrics['accuracy'], accuracy_score(y_true, y_pred))
+    np.testing.assert_allclose(metrics['precision'], precision_score(y_true, y_pred, average='weighted'))
+    np.testing.assert_allclose(metrics['recall'], recall_score(y_true, y_pred, average='weighted'))
+    np.testing.assert_allclose(metrics['f1_score'], f1_score(y_true, y_pred, average='weighted'))
+    assert metrics['confusion_matrix'] == confusion_matrix(y_true, y_pred).tolist()
+
+    expected_auc = roc_auc_score(y_true, y_proba, multi_class='ovr', average='weighted')
+    assert abs(metrics['roc_auc'] - expected_auc) < 2e-3
+
+def test_merge_equals_single_pass(tmp_path):
+    y_true, y_pred, y_proba = make_predictions()
+
+    whole = StreamingEvaluator().update(y_true, y_pred, y_proba)
+    first = StreamingEvaluator().update(y_true[:2000], y_pred[:2000], y_proba[:2000])
+    second = StreamingEvaluator().update(y_true[2000:], y_pred[2000:], y_proba[2000:])
+
+    second.save(tmp_path / 'second.npz')
+    merged = first.merge(StreamingEvaluator.load(tmp_path / 'second.npz'))
+
+    np.testing.assert_array_equal(merged.confusion, whole.confusion)
+    np.testing.assert_array_equal(merged.positive_hist, whole.positive_hist)
+    np.testing.assert_array_equal(merged.negative_hist, whole.negative_hist)
+
+def test_confidence_intervals_bracket_the_estimate():
+    y_true, y_pred, y_proba = make_predictions()
+    evaluator = StreamingEvaluator().update(y_true, y_pred, y_proba)
+
+    metrics = evaluator.compute()
+    intervals = evaluator.confidence_intervals(n_bootstrap=500)
+
+    for name in ('accuracy', 'precision', 'recall', 'f1_score', 'roc_auc'):
+        assert intervals[name]['lower'] <= metrics[name] <= intervals[name]['upper']
+
+@pytest.mark.parametrize('y_true, y_pred', [
+    ([0, 1, 3], [0, 1, 2]),
+    ([0, -1, 2], [0, 1, 2]),
+    ([0, 1, 2], [0, 1, -1]),
+    ([0.0, np.nan, 2.0], [0, 1, 2]),
+    ([0, 1], [0, 1, 2])
+])
+def test_invalid_labels_are_rejected(y_true, y_pred):
+    evaluator = StreamingEvaluator()
+    with pytest.raises(ValueError):
+        evaluator.update(y_true, y_pred)
+    assert evaluator.n_samples == 0